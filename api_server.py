@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from clients import instrumentation
+from clients.cache import TTLCache
+
+TRENDING_TTL = 300
+ANALYZE_TTL = 300
+QUOTE_TTL = 30
+MAX_SYMBOLS = 50
+# Seconds a client gets to send its request line and headers
+READ_TIMEOUT = 10
+
+# Yahoo-style symbols: letters first, then letters, digits, '.' or '-' (BRK-B)
+TICKER_PATTERN = re.compile(r"[A-Z][A-Z0-9.\-]{0,9}")
+
+# First path segments, used to label per-route timings
+ROUTES = ('health', 'metrics', 'trending', 'analyze', 'quotes')
+
+_MISSING = object()
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               408: "Request Timeout", 500: "Internal Server Error"}
+
+
+class SingleFlightCache:
+    """
+    Caches results of blocking client calls and coalesces concurrent misses.
+
+    While a key is being fetched, every other request for it awaits the same
+    in-flight task, so N simultaneous requests trigger one upstream call.
+    """
+
+    def __init__(self, name, ttl):
+        self.name = name
+        self.cache = TTLCache(ttl=ttl)
+        self.inflight = {}
+
+    async def get(self, key, fn, *args):
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            instrumentation.record_cache(self.name, True)
+            return value
+
+        task = self.inflight.get(key)
+        if task is not None:
+            # Coalesced onto a fetch already in progress
+            instrumentation.record_cache(self.name, True)
+        else:
+            instrumentation.record_cache(self.name, False)
+            task = asyncio.ensure_future(self._load(key, fn, args))
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        # Shielded so a disconnecting client doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _load(self, key, fn, args):
+        value = await asyncio.to_thread(fn, *args)
+        self.cache.set(key, value)
+        return value
+
+
+class ScannerService:
+    """Routes HTTP requests to the client functions through shared caches."""
+
+    def __init__(self, trending_ttl=TRENDING_TTL, analyze_ttl=ANALYZE_TTL, quote_ttl=QUOTE_TTL,
+                 read_timeout=READ_TIMEOUT):
+        self.read_timeout = read_timeout
+        self.trending = SingleFlightCache('api.trending', trending_ttl)
+        self.analyses = SingleFlightCache('api.analyze', analyze_ttl)
+        self.quotes = SingleFlightCache('api.quotes', quote_ttl)
+
+    async def handle(self, path, query):
+        """
+        Dispatches one GET request.
+
+        Returns:
+            tuple: (status code, body dict or str)
+        """
+        if path == "/health":
+            return 200, {"status": "ok"}
+
+        if path == "/metrics":
+            return 200, instrumentation.prometheus_text()
+
+        if path == "/trending":
+            from scanner_cli import get_trending
+            return 200, await self.trending.get('trending', get_trending)
+
+        if path.startswith("/analyze/"):
+            from scanner_cli import analyze_ticker
+            ticker = path[len("/analyze/"):].replace('$', '').upper()
+            if not ticker:
+                return 400, {"error": "ticker is required"}
+            if not TICKER_PATTERN.fullmatch(ticker):
+                return 400, {"error": f"invalid ticker: {ticker}"}
+            use_llm = query.get('llm', ['0'])[0] in ('1', 'true')
+            analysis = await self.analyses.get((ticker, use_llm), analyze_ticker, ticker, use_llm)
+            return 200, analysis.to_dict()
+
+        if path == "/quotes":
+            from clients.yahoo_client import get_quote
+            raw = ",".join(query.get('symbols', []))
+            symbols = list(dict.fromkeys(s.strip().upper() for s in raw.split(',') if s.strip()))
+            if not symbols:
+                return 400, {"error": "symbols is required, e.g. /quotes?symbols=AAPL,MSFT"}
+            if len(symbols) > MAX_SYMBOLS:
+                return 400, {"error": f"at most {MAX_SYMBOLS} symbols per request"}
+            quotes = await asyncio.gather(*(self.quotes.get(s, get_quote, s) for s in symbols))
+            return 200, {s: q.to_dict() if q else None for s, q in zip(symbols, quotes)}
+
+        return 404, {"error": f"no route for {path}"}
+
+    async def _dispatch(self, method, target):
+        if method != "GET":
+            return 405, {"error": "only GET is supported"}
+        url = urlsplit(target)
+        try:
+            route = url.path.strip('/').split('/')[0]
+            if route not in ROUTES:
+                route = 'other'
+            with instrumentation.span(f"api.{route}"):
+                return await self.handle(url.path.rstrip('/') or '/', parse_qs(url.query))
+        except Exception as e:
+            print(f"Error handling {target}: {e}")
+            return 500, {"error": str(e)}
+
+    @staticmethod
+    async def _read_request(reader):
+        request_line = await reader.readline()
+        # Drain headers; no route needs them or a body
+        while True:
+            line = await reader.readline()
+            if not line or line in (b"\r\n", b"\n"):
+                break
+        return request_line
+
+    async def serve_connection(self, reader, writer):
+        try:
+            try:
+                # A client that connects and never sends would otherwise hold the connection forever
+                request_line = await asyncio.wait_for(self._read_request(reader), self.read_timeout)
+            except asyncio.TimeoutError:
+                request_line = None
+
+            if request_line is None:
+                status, body = 408, {"error": f"no request within {self.read_timeout:g}s"}
+            else:
+                parts = request_line.decode('latin-1').split()
+                if len(parts) < 2:
+                    return
+                status, body = await self._dispatch(parts[0], parts[1])
+
+            if isinstance(body, str):
+                payload, content_type = body.encode('utf-8'), "text/plain; version=0.0.4"
+            else:
+                payload, content_type = json.dumps(body, indent=2).encode('utf-8'), "application/json"
+
+            head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    "Connection: close\r\n\r\n")
+            writer.write(head.encode('latin-1') + payload)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host, port, workers, service=None):
+    loop = asyncio.get_running_loop()
+    # Client calls are blocking; this bounds how many run at once
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=workers))
+
+    service = service or ScannerService()
+    server = await asyncio.start_server(service.serve_connection, host, port)
+    print(f"Stock Sentiment API listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stock Sentiment Scanner HTTP API")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=8, help="Max concurrent upstream fetches")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
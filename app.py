@@ -2,8 +2,10 @@ import streamlit as st
 import pandas as pd
 import warnings
 from clients.reddit_client import get_trending_tickers, get_ticker_discussions
-from clients.yahoo_client import get_stock_news, get_stock_data, get_yahoo_trending, get_market_news
-from sentiment import analyze_text, generate_signal
+from clients.yahoo_client import get_stock_news, get_stock_data, get_quote, get_yahoo_trending, get_market_news
+from sentiment import analyze_text, generate_signal, score_posts, SENTIMENT_HALF_LIFE_HOURS
+from clients import dedup, instrumentation
+from snapshot import load_snapshot
 
 # Suppress SSL warnings from urllib3
 warnings.filterwarnings("ignore", category=UserWarning, module='urllib3')
@@ -30,7 +32,7 @@ if ticker_input:
                 from clients.llm_client import analyze_with_llm
                 # Re-fetch data for the LLM to ensure it has latest context
                 # (We could optimize by passing data if already fetched, but for now this is cleaner)
-                llm_stock = get_stock_data(ticker_input, extended_info=True)
+                llm_stock = get_quote(ticker_input, extended_info=True)
                 llm_reddit = get_ticker_discussions(ticker_input, limit=10)
                 llm_news = get_stock_news(ticker_input)
                 
@@ -64,19 +66,16 @@ if ticker_input:
     reddit_posts = get_ticker_discussions(ticker_input, limit=20)
     
     if reddit_posts:
-        reddit_scores = []
-        for post in reddit_posts:
-            sentiment = analyze_text(f"{post['title']} {post['body']}")
-            reddit_scores.append(sentiment['compound'])
-            
-        avg_reddit_sentiment = sum(reddit_scores) / len(reddit_scores) if reddit_scores else 0
-        st.metric("Avg Reddit Sentiment", f"{avg_reddit_sentiment:.2f}")
+        # Weighted by upvotes and decayed by age; posts seen on earlier refreshes aren't re-scored
+        avg_reddit_sentiment = score_posts(ticker_input, reddit_posts)
+        st.metric("Reddit Sentiment", f"{avg_reddit_sentiment:.2f}",
+                  help=f"Weighted by post score, halving every {SENTIMENT_HALF_LIFE_HOURS}h of post age")
         
         with st.expander("Recent Reddit Discussions"):
             for post in reddit_posts:
-                st.markdown(f"**[{post['title']}]({post['url']})**")
-                st.caption(f"Score: {post['score']} | Subreddit: r/{post['subreddit']}")
-                st.write(post['body'][:200] + "..." if len(post['body']) > 200 else post['body'])
+                st.markdown(f"**[{post.title}]({post.url})**")
+                st.caption(f"Score: {post.score} | Subreddit: r/{post.subreddit}")
+                st.write(post.body[:200] + "..." if len(post.body) > 200 else post.body)
                 st.markdown("---")
     else:
         st.info("No recent Reddit discussions found for this ticker.")
@@ -88,11 +87,10 @@ if ticker_input:
     
     if news_items:
         news_scores = []
-        for item in news_items:
-            title = item.get('title', '')
-            if title:
-                sentiment = analyze_text(title)
-                news_scores.append(sentiment['compound'])
+        # Syndicated copies of a headline are scored once
+        for title in dedup.unique([item.get('title', '') for item in news_items if item.get('title')]):
+            sentiment = analyze_text(title)
+            news_scores.append(sentiment['compound'])
                 
         avg_news_sentiment = sum(news_scores) / len(news_scores) if news_scores else 0
         st.metric("Avg News Sentiment", f"{avg_news_sentiment:.2f}")
@@ -119,6 +117,14 @@ if ticker_input:
         overall_sentiment = (avg_reddit_sentiment + avg_news_sentiment) / 2
         mention_volume = len(reddit_posts) if reddit_posts else 0
         price_trend = stock_data['change_pct'] if stock_data else 0
+        trend_label = "Trend"
+
+        # Prefer the 5-day trend when the local history store has this ticker
+        from history_store import get_return_pct
+        trend_5d = get_return_pct(ticker_input, 5)
+        if trend_5d is not None:
+            price_trend = trend_5d
+            trend_label = "Trend (5d)"
         
         signal = generate_signal(overall_sentiment, mention_volume, price_trend)
         
@@ -133,7 +139,7 @@ if ticker_input:
         else:
             st.info(f"Signal: **{signal}** 👀")
             
-        st.caption(f"Based on Sentiment: {overall_sentiment:.2f} | Mentions: {mention_volume} | Trend: {price_trend:.2f}%")
+        st.caption(f"Based on Sentiment: {overall_sentiment:.2f} | Mentions: {mention_volume} | {trend_label}: {price_trend:.2f}%")
 
     st.markdown("---")
 
@@ -142,9 +148,28 @@ st.header("📊 Market Overview")
 tab_reddit, tab_squeeze, tab_yahoo, tab_news = st.tabs(["🔥 Reddit Trends", "🚀 Potential Squeezes", "📈 Yahoo Trends", "📢 Major News"])
 
 # Fetch shared data
+# A fresh snapshot from snapshot.py makes the overview a file read
+snapshot = load_snapshot()
+snapshot_quotes = {}
+if snapshot:
+    snapshot_quotes = {t: a['market_data'] for t, a in snapshot['analyses'].items() if a.get('market_data')}
+    from datetime import datetime
+    st.caption(f"Overview from the {datetime.fromtimestamp(snapshot['created']).strftime('%H:%M')} scan snapshot")
+
+def overview_stock_data(ticker, extended_info=False):
+    """Market data from the snapshot when it has the ticker, otherwise live."""
+    data = snapshot_quotes.get(ticker)
+    if data is not None:
+        return data
+    return get_stock_data(ticker, extended_info=extended_info)
+
 trending_tickers = []
 try:
-    trending_tickers = get_trending_tickers()
+    if snapshot:
+        mentions = snapshot['trending']['reddit_mentions']
+        trending_tickers = [(t, mentions.get(t, 0)) for t in snapshot['trending']['reddit_trending']]
+    else:
+        trending_tickers = get_trending_tickers()
 except Exception as e:
     st.error(f"Error serving Reddit trends: {e}")
 
@@ -154,7 +179,7 @@ with tab_reddit:
     if trending_tickers:
         data = []
         for ticker, mentions in trending_tickers[:10]:
-            stock_data = get_stock_data(ticker)
+            stock_data = overview_stock_data(ticker)
             price = "N/A"
             trend = "N/A"
             prev_close = "N/A"
@@ -194,7 +219,7 @@ with tab_squeeze:
         squeeze_data = []
         with st.spinner("Analyzing top tickers..."):
             for ticker, mentions in trending_tickers[:10]:
-                data = get_stock_data(ticker, extended_info=True)
+                data = overview_stock_data(ticker, extended_info=True)
                 if data:
                     short_float = data.get('short_float', 0)
                     if short_float is None: short_float = 0
@@ -230,12 +255,15 @@ with tab_squeeze:
 with tab_yahoo:
     st.header("📈 Trending on Yahoo Finance")
     try:
-        yahoo_trending = get_yahoo_trending()
+        if snapshot:
+            yahoo_trending = [{'symbol': t} for t in snapshot['trending']['yahoo_trending']]
+        else:
+            yahoo_trending = get_yahoo_trending()
         if yahoo_trending:
             y_data = []
             for item in yahoo_trending[:10]:
                 ticker = item.get('symbol')
-                stock_data = get_stock_data(ticker)
+                stock_data = overview_stock_data(ticker)
                 price = "N/A"
                 trend = "N/A"
                 prev_close = "N/A"
@@ -270,7 +298,7 @@ with tab_yahoo:
 with tab_news:
     st.header("📢 Major Market News")
     try:
-        market_news = get_market_news()
+        market_news = snapshot['market_news'] if snapshot and snapshot['market_news'] is not None else get_market_news()
         if market_news:
             for item in market_news[:10]:
                 col1, col2 = st.columns([3, 1])
@@ -299,3 +327,31 @@ with tab_news:
             st.info("No market news found at the moment.")
     except Exception as e:
         st.error(f"Error fetching market news: {e}")
+
+# --- DIAGNOSTICS ---
+# Metrics accumulate across reruns of this Streamlit process
+with st.sidebar.expander("🩺 Diagnostics"):
+    metrics = instrumentation.snapshot()
+    if metrics['spans']:
+        st.caption("Stage timings")
+        st.dataframe(pd.DataFrame([
+            {"Stage": stage, "Calls": m['calls'], "Total (s)": round(m['seconds'], 3), "Max (s)": round(m['max'], 3)}
+            for stage, m in sorted(metrics['spans'].items(), key=lambda kv: -kv[1]['seconds'])
+        ]), hide_index=True)
+    if metrics['http']:
+        st.caption("Upstream hosts")
+        st.dataframe(pd.DataFrame([
+            {"Host": host, "Calls": m['calls'], "KB": round(m['bytes'] / 1024, 1), "Retries": m['retries'],
+             "Errors": m['errors'], "Time (s)": round(m['seconds'], 3)}
+            for host, m in sorted(metrics['http'].items())
+        ]), hide_index=True)
+    if metrics['caches']:
+        st.caption("Caches")
+        st.dataframe(pd.DataFrame([
+            {"Cache": cache, "Hits": m['hits'], "Misses": m['misses'],
+             "Hit Rate": f"{m['hits'] / max(m['hits'] + m['misses'], 1):.0%}"}
+            for cache, m in sorted(metrics['caches'].items())
+        ]), hide_index=True)
+    st.download_button("Export (Prometheus)", instrumentation.prometheus_text(), file_name="scanner_metrics.prom")
+    if st.button("Reset metrics"):
+        instrumentation.reset()
@@ -0,0 +1,262 @@
+import argparse
+import csv
+import os
+from datetime import date
+import numpy as np
+from sentiment import SENTIMENT_THRESHOLD, MENTION_THRESHOLD, AVOID_THRESHOLD
+from history_store import load_history
+
+OBSERVATIONS_PATH = os.getenv("SENTIMENT_HISTORY_FILE", os.path.join("data", "sentiment_history.csv"))
+OBSERVATION_FIELDS = ['date', 'ticker', 'reddit_score', 'news_score', 'mentions', 'posts',
+                      'reddit_weighted_score']
+# The dashboard signal's trend is the 5-day return from the history store
+TREND_DAYS = 5
+
+# Signal codes, in the order generate_signal checks its rules
+STRONG_BUY, BUY, SELL, AVOID, WATCH = range(5)
+SIGNAL_NAMES = ['STRONG BUY', 'BUY', 'SELL', 'AVOID', 'WATCH']
+BULLISH = (STRONG_BUY, BUY)
+
+
+def append_observations(analyses, mentions=None, path=OBSERVATIONS_PATH, day=None):
+    """
+    Appends today's per-ticker sentiment to the observations CSV.
+
+    Args:
+        analyses (dict): ticker -> TickerAnalysis.
+        mentions (dict): ticker -> Reddit mention count from the trending scan.
+        path (str): CSV file; created with a header if missing.
+        day (date): Observation date; defaults to today.
+    """
+    mentions = mentions or {}
+    day = (day or date.today()).isoformat()
+    new_file = not os.path.exists(path)
+    if not new_file:
+        _upgrade_observations(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'a', newline='') as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(OBSERVATION_FIELDS)
+        for ticker, analysis in analyses.items():
+            writer.writerow([day, ticker, f"{analysis.reddit_score:.4f}", f"{analysis.news_score:.4f}",
+                             mentions.get(ticker, 0), analysis.reddit_post_count,
+                             f"{analysis.reddit_weighted_score:.4f}"])
+
+
+def _upgrade_observations(path):
+    # Files written before a column was added are rewritten with the current
+    # header; a missing weighted score falls back to the plain mean
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames == OBSERVATION_FIELDS:
+            return
+        rows = list(reader)
+    for row in rows:
+        row.setdefault('reddit_weighted_score', row['reddit_score'])
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, OBSERVATION_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def load_observations(path=OBSERVATIONS_PATH):
+    """
+    Loads the observations CSV into per-ticker arrays.
+
+    Sentiment is the mean of the weighted Reddit score and the news score,
+    as in the dashboard signal. Mention volume is the trending scan's
+    mention count (0 for tickers outside the trending list), as in the
+    digest; the dashboard passes its post count instead, which is capped at
+    20 posts, so mention thresholds carry over only approximately.
+    Repeated observations of a ticker on one day keep the last.
+
+    Returns:
+        dict: ticker -> (dates datetime64[D], sentiment float64, mentions float64)
+    """
+    rows = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            reddit = row.get('reddit_weighted_score') or row['reddit_score']
+            sentiment = (float(reddit) + float(row['news_score'])) / 2
+            rows.setdefault(row['ticker'], {})[row['date']] = (sentiment, float(row['mentions']))
+
+    series = {}
+    for ticker, by_day in rows.items():
+        days = sorted(by_day)
+        values = np.array([by_day[d] for d in days], dtype=np.float64)
+        series[ticker] = (np.array(days, dtype='datetime64[D]'), values[:, 0], values[:, 1])
+    return series
+
+
+def build_panel(observations, horizon=5, trend_days=TREND_DAYS):
+    """
+    Aligns sentiment observations with stored daily prices.
+
+    For an observation on day d, the entry is the first close after d (the
+    signal is only known once the day's posts are in), the exit is `horizon`
+    bars later, and the price trend is the `trend_days` return into day d.
+
+    Returns:
+        dict: Flat arrays 'sentiment', 'mentions', 'trend', 'forward_return'
+        and 'entry_day' (datetime64[D]) over every ticker-day with a usable
+        entry and exit.
+    """
+    columns = {'sentiment': [], 'mentions': [], 'trend': [], 'forward_return': [], 'entry_day': []}
+    for ticker, (days, sentiment, mentions) in observations.items():
+        bars = load_history(ticker)
+        if len(bars) < horizon + trend_days + 1:
+            continue
+        bar_days = bars['ts'].astype('datetime64[s]').astype('datetime64[D]')
+        close = np.asarray(bars['close'])
+
+        entry = np.searchsorted(bar_days, days, side='right')
+        last = entry - 1
+        usable = (last >= trend_days) & (entry + horizon < len(close))
+        entry, last = entry[usable], last[usable]
+
+        columns['sentiment'].append(sentiment[usable])
+        columns['mentions'].append(mentions[usable])
+        columns['trend'].append((close[last] / close[last - trend_days] - 1) * 100)
+        columns['forward_return'].append(close[entry + horizon] / close[entry] - 1)
+        columns['entry_day'].append(bar_days[entry])
+
+    empty = {'entry_day': np.empty(0, dtype='datetime64[D]')}
+    return {name: np.concatenate(parts) if parts else empty.get(name, np.empty(0))
+            for name, parts in columns.items()}
+
+
+def generate_signals(sentiment, mentions, trend, sentiment_threshold=SENTIMENT_THRESHOLD,
+                     mention_threshold=MENTION_THRESHOLD, avoid_threshold=AVOID_THRESHOLD):
+    """
+    Vectorized sentiment.generate_signal over whole arrays.
+
+    Returns:
+        numpy.ndarray: Signal codes (STRONG_BUY ... WATCH), one per element.
+    """
+    active = mentions > mention_threshold
+    bullish = (sentiment > sentiment_threshold) & active
+    return np.select(
+        [bullish & (trend > 0), bullish, (sentiment < -sentiment_threshold) & active,
+         sentiment < avoid_threshold],
+        [STRONG_BUY, BUY, SELL, AVOID],
+        default=WATCH
+    )
+
+
+def evaluate(panel, **thresholds):
+    """
+    Scores each signal by its forward returns.
+
+    A bullish signal is a hit when the forward return is positive; SELL and
+    AVOID are hits when it is negative. WATCH's hit rate is just the share
+    of up moves, a baseline for the others.
+
+    Returns:
+        dict: signal name -> {'count', 'hit_rate', 'mean_return'}
+    """
+    signals = generate_signals(panel['sentiment'], panel['mentions'], panel['trend'], **thresholds)
+    returns = panel['forward_return']
+    counts = np.bincount(signals, minlength=len(SIGNAL_NAMES))
+    sums = np.bincount(signals, weights=returns, minlength=len(SIGNAL_NAMES))
+    ups = np.bincount(signals, weights=(returns > 0).astype(np.float64), minlength=len(SIGNAL_NAMES))
+
+    report = {}
+    for code, name in enumerate(SIGNAL_NAMES):
+        n = int(counts[code])
+        hits = ups[code] if code in BULLISH or code == WATCH else n - ups[code]
+        report[name] = {
+            'count': n,
+            'hit_rate': float(hits / n) if n else None,
+            'mean_return': float(sums[code] / n) if n else None,
+        }
+    return report
+
+
+def sweep(panel, sentiment_thresholds, mention_thresholds):
+    """
+    Evaluates BUY-or-better and SELL rules over a grid of thresholds at once.
+
+    Every (sentiment, mention) pair is computed in one broadcast over the
+    panel instead of re-running the signal logic per pair.
+
+    Returns:
+        list: Dicts with the thresholds and each side's count, hit rate and
+        mean forward return, best bullish mean return first.
+    """
+    s_thr = np.asarray(sentiment_thresholds, dtype=np.float64)
+    m_thr = np.asarray(mention_thresholds, dtype=np.float64)
+    sentiment, mentions, returns = panel['sentiment'], panel['mentions'], panel['forward_return']
+
+    active = mentions[:, None] > m_thr[None, :]                          # (N, M)
+    long_mask = (sentiment[:, None] > s_thr[None, :])[:, :, None] & active[:, None, :]    # (N, S, M)
+    short_mask = (sentiment[:, None] < -s_thr[None, :])[:, :, None] & active[:, None, :]
+
+    def side_stats(mask, hit):
+        n = mask.sum(axis=0)
+        hits = np.einsum('nsm,n->sm', mask, hit.astype(np.float64))
+        total = np.einsum('nsm,n->sm', mask, returns)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return n, hits / n, total / n
+
+    long_n, long_hit, long_ret = side_stats(long_mask, returns > 0)
+    short_n, short_hit, short_ret = side_stats(short_mask, returns < 0)
+
+    results = []
+    for i, s in enumerate(s_thr):
+        for j, m in enumerate(m_thr):
+            results.append({
+                'sentiment_threshold': float(s),
+                'mention_threshold': float(m),
+                'buy_count': int(long_n[i, j]),
+                'buy_hit_rate': None if long_n[i, j] == 0 else float(long_hit[i, j]),
+                'buy_mean_return': None if long_n[i, j] == 0 else float(long_ret[i, j]),
+                'sell_count': int(short_n[i, j]),
+                'sell_hit_rate': None if short_n[i, j] == 0 else float(short_hit[i, j]),
+                'sell_mean_return': None if short_n[i, j] == 0 else float(short_ret[i, j]),
+            })
+    results.sort(key=lambda r: -np.inf if r['buy_mean_return'] is None else r['buy_mean_return'], reverse=True)
+    return results
+
+
+def _fmt(value, signed=True):
+    if value is None:
+        return "-"
+    return f"{value * 100:+.2f}%" if signed else f"{value:.1%}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the sentiment signal rules")
+    parser.add_argument("--observations", default=OBSERVATIONS_PATH, help="Sentiment observations CSV")
+    parser.add_argument("--horizon", type=int, default=5, help="Forward return horizon in trading days")
+    parser.add_argument("--update-prices", action="store_true", help="Update the history store first")
+    parser.add_argument("--sweep", action="store_true", help="Sweep sentiment and mention thresholds")
+    parser.add_argument("--sentiment-grid", default="0.05,0.1,0.15,0.2,0.3,0.4,0.5",
+                        help="Comma-separated sentiment thresholds for --sweep")
+    parser.add_argument("--mention-grid", default="0,2,5,10,20,50",
+                        help="Comma-separated mention thresholds for --sweep")
+    args = parser.parse_args()
+
+    observations = load_observations(args.observations)
+    if args.update_prices:
+        from history_store import update_history
+        update_history(sorted(observations))
+
+    panel = build_panel(observations, args.horizon)
+    print(f"{len(panel['forward_return'])} ticker-days across {len(observations)} tickers, "
+          f"{args.horizon}-day forward returns\n")
+
+    print("Signal        Count  Hit rate  Mean return")
+    for name, stats in evaluate(panel).items():
+        print(f"{name:<12} {stats['count']:>6}  {_fmt(stats['hit_rate'], signed=False):>8}  "
+              f"{_fmt(stats['mean_return']):>11}")
+
+    if args.sweep:
+        grid = sweep(panel,
+                     [float(x) for x in args.sentiment_grid.split(',')],
+                     [float(x) for x in args.mention_grid.split(',')])
+        print("\nSent  Ment   Buys  Hit rate  Mean ret   Sells  Hit rate  Mean ret")
+        for r in grid:
+            print(f"{r['sentiment_threshold']:4.2f} {r['mention_threshold']:5.0f} {r['buy_count']:>6}  "
+                  f"{_fmt(r['buy_hit_rate'], signed=False):>8}  {_fmt(r['buy_mean_return']):>8} "
+                  f"{r['sell_count']:>7}  {_fmt(r['sell_hit_rate'], signed=False):>8}  {_fmt(r['sell_mean_return']):>8}")
@@ -0,0 +1,89 @@
+"""
+Cold-start import budget for each scanner_cli mode.
+
+Usage:
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --budget trending=200
+
+Each mode is run in a fresh interpreter under ``python -X importtime``. The
+total import time is compared against the mode's budget, and modes that
+must stay light fail if they import any heavy dependency. The trending mode
+runs against the replay cassette so it needs no network.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['yfinance', 'pandas', 'google.genai', 'vaderSentiment']
+
+# mode -> (interpreter args, import budget in ms, modules that must not load)
+MODES = {
+    'startup': (['scanner_cli.py', '--help'], 150, HEAVY_MODULES),
+    'trending': (['scanner_cli.py', '--mode', 'trending'], 250, HEAVY_MODULES),
+    # What an analyze run imports on first use, without doing the network work
+    'analyze': (['-c', 'import scanner_cli, yfinance, vaderSentiment.vaderSentiment'], 1500,
+                ['google.genai']),
+    'analyze-llm': (['-c', 'import scanner_cli, yfinance, vaderSentiment.vaderSentiment, google.genai'],
+                    2500, []),
+}
+
+
+def measure(args):
+    """
+    Runs the interpreter with -X importtime.
+
+    Returns:
+        tuple: (total import ms, set of imported module names, exit code)
+    """
+    env = dict(os.environ, SCANNER_CASSETTE=os.getenv("SCANNER_CASSETTE", "replay"))
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        modules.add(name.strip())
+    return total_us / 1000, modules, result.returncode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check scanner_cli import-time budgets")
+    parser.add_argument("--budget", action="append", default=[],
+                        help="Override a budget, e.g. trending=200 (milliseconds)")
+    parser.add_argument("--mode", action="append", choices=sorted(MODES), help="Only check these modes")
+    args = parser.parse_args(argv)
+
+    budgets = {mode: spec[1] for mode, spec in MODES.items()}
+    for override in args.budget:
+        mode, _, value = override.partition('=')
+        budgets[mode] = float(value)
+
+    failures = []
+    for mode in args.mode or MODES:
+        interpreter_args, _, forbidden = MODES[mode]
+        total_ms, modules, returncode = measure(interpreter_args)
+        loaded = [m for m in forbidden if m in modules]
+        status = "ok"
+        if returncode != 0:
+            # A crash cuts the import trace short, so the timing means nothing
+            status = f"EXITED {returncode}"
+            failures.append(mode)
+        elif total_ms > budgets[mode]:
+            status = "OVER BUDGET"
+            failures.append(mode)
+        if loaded:
+            status = f"LOADED {', '.join(loaded)}"
+            failures.append(mode)
+        print(f"{mode:<12} {total_ms:>8.1f} ms  (budget {budgets[mode]:.0f} ms)  {status}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Benchmarks for the scanner's hot paths, driven by replayed fixtures.
+
+Usage:
+    python -m benchmarks.run                     # compare against the baseline
+    python -m benchmarks.run --update-baseline   # store current numbers
+    python -m benchmarks.run --cassette-dir cassettes --threshold 0.2
+
+Fixtures come from a recorded cassette (see clients/cassette.py). Extraction
+and scoring fall back to a synthetic corpus when no Reddit fixtures exist;
+the digest and dashboard benchmarks are skipped without fixtures.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+from clients import cassette, instrumentation
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.20
+MIN_SECONDS = 1.0
+
+# metric -> True if a larger value is better
+HIGHER_IS_BETTER = {
+    'extract_mb_per_sec': True,
+    'scores_per_sec': True,
+    'digest_seconds': False,
+    'digest_requests': False,
+    'dashboard_seconds': False,
+    'dashboard_requests': False,
+}
+
+
+def load_reddit_corpus(directory):
+    """Returns post texts from recorded Reddit listings, or [] if none exist."""
+    texts = []
+    for path in glob.glob(os.path.join(directory, "http", "*.json")):
+        with open(path, encoding='utf-8') as f:
+            entry = json.load(f)
+        if "reddit.com" not in entry.get('url', '') or entry.get('status_code') != 200:
+            continue
+        try:
+            children = json.loads(entry['body']).get('data', {}).get('children', [])
+        except ValueError:
+            continue
+        for post in children:
+            data = post.get('data', {})
+            texts.append(f"{data.get('title', '')} {data.get('selftext', '')}")
+    return texts
+
+
+def synthetic_corpus(posts=2000, seed=7):
+    """Builds a deterministic corpus that looks enough like r/wallstreetbets."""
+    rng = random.Random(seed)
+    words = ("the market is going to moon after earnings call guidance was strong but "
+             "puts are printing and I think we see a squeeze soon bears are wrong "
+             "calls expire friday short interest is high dip buy hold sell").split()
+    tickers = ["GME", "$AMC", "TSLA", "NVDA", "PLTR", "$SPY", "AAPL", "MSFT", "YOLO", "CEO", "DD"]
+    texts = []
+    for _ in range(posts):
+        length = rng.randint(10, 300)
+        tokens = [rng.choice(tickers) if rng.random() < 0.05 else rng.choice(words) for _ in range(length)]
+        texts.append(" ".join(tokens))
+    return texts
+
+
+def _repeat(fn, min_seconds=MIN_SECONDS):
+    """Runs `fn` until at least `min_seconds` have passed; returns (runs, seconds)."""
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return runs, elapsed
+
+
+def bench_extraction(texts):
+    from clients.reddit_client import extract_tickers
+
+    size_mb = sum(len(t.encode('utf-8')) for t in texts) / 1e6
+
+    def run():
+        for text in texts:
+            extract_tickers(text)
+
+    runs, elapsed = _repeat(run)
+    return {'extract_mb_per_sec': size_mb * runs / elapsed}
+
+
+def bench_scoring(texts):
+    from sentiment import analyze_text
+
+    sample = texts[:500]
+
+    def run():
+        for text in sample:
+            analyze_text(text)
+
+    runs, elapsed = _repeat(run)
+    return {'scores_per_sec': len(sample) * runs / elapsed}
+
+
+def _reset_caches():
+    from clients import reddit_client
+    reddit_client._listing_cache.clear()
+    instrumentation.reset()
+
+
+def bench_digest():
+    from scanner_cli import get_trending
+    from notify_telegram import build_digests
+
+    _reset_caches()
+    subscriber = {'chat_id': 'bench', 'watchlist': [], 'sections': ['reddit', 'deep_dive', 'yahoo', 'news']}
+    start = time.perf_counter()
+    build_digests([subscriber], get_trending())
+    elapsed = time.perf_counter() - start
+    return {
+        'digest_seconds': elapsed,
+        'digest_requests': instrumentation.total_requests()
+    }
+
+
+def bench_dashboard():
+    """Replays the data the dashboard's overview tabs load on first paint."""
+    from clients.reddit_client import get_trending_tickers
+    from clients.yahoo_client import get_stock_data, get_yahoo_trending
+
+    _reset_caches()
+    start = time.perf_counter()
+    trending = get_trending_tickers()
+    for ticker, _ in trending[:10]:
+        get_stock_data(ticker)
+        get_stock_data(ticker, extended_info=True)
+    for item in get_yahoo_trending()[:10]:
+        get_stock_data(item.get('symbol'))
+    elapsed = time.perf_counter() - start
+    return {
+        'dashboard_seconds': elapsed,
+        'dashboard_requests': instrumentation.total_requests()
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results against the baseline.
+
+    Timings and throughputs may drift by `threshold` (a fraction); request
+    counts are deterministic under replay, so any increase is a regression.
+
+    Returns:
+        list: Human-readable regression descriptions.
+    """
+    regressions = []
+    for metric, value in results.items():
+        base = baseline.get(metric)
+        if base is None:
+            continue
+        if metric.endswith('_requests'):
+            if value > base:
+                regressions.append(f"{metric}: {value} requests (baseline {base})")
+        elif HIGHER_IS_BETTER[metric]:
+            if value < base * (1 - threshold):
+                regressions.append(f"{metric}: {value:.2f} < {base:.2f} by more than {threshold:.0%}")
+        elif value > base * (1 + threshold):
+            regressions.append(f"{metric}: {value:.2f} > {base:.2f} by more than {threshold:.0%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stock Sentiment Scanner benchmarks")
+    parser.add_argument("--cassette-dir", default=os.getenv("SCANNER_CASSETTE_DIR", "cassettes"),
+                        help="Recorded fixtures to replay")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown as a fraction of the baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Store results as the new baseline")
+    parser.add_argument("--output", help="Also write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    cassette.configure(mode='replay', directory=args.cassette_dir, latency_ms=0, error_rate=0)
+
+    texts = load_reddit_corpus(args.cassette_dir)
+    has_fixtures = bool(texts)
+    if not has_fixtures:
+        print(f"No Reddit fixtures in {args.cassette_dir}; using a synthetic corpus "
+              "and skipping digest/dashboard benchmarks.")
+        texts = synthetic_corpus()
+
+    results = {}
+    results.update(bench_extraction(texts))
+    results.update(bench_scoring(texts))
+    if has_fixtures:
+        results.update(bench_digest())
+        results.update(bench_dashboard())
+
+    for metric, value in results.items():
+        print(f"{metric:<22} {value:>12.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --update-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
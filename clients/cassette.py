@@ -0,0 +1,275 @@
+"""
+Record/replay layer for every upstream call the clients make.
+
+SCANNER_CASSETTE selects the mode:
+
+- ``off`` (default): calls go straight to the network.
+- ``record``: calls go to the network and each response is saved under
+  SCANNER_CASSETTE_DIR (default ``cassettes/``).
+- ``replay``: responses are served from the saved files, so the whole
+  pipeline runs offline and deterministically. SCANNER_REPLAY_LATENCY_MS
+  adds a fixed delay per call and SCANNER_REPLAY_429_RATE makes that
+  fraction of HTTP calls answer 429, to exercise retry paths.
+
+HTTP clients (Reddit, Yahoo trending, Telegram) are captured per request via
+``request()``, which also applies the shared per-host rate limits from
+``clients.throttle`` to live calls. Library-backed calls (yfinance, Gemini) are captured per
+function call via the ``recorded`` decorator.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+import random
+import re
+import threading
+import time
+from clients import instrumentation
+
+_config = {
+    'mode': os.getenv("SCANNER_CASSETTE", "off").lower(),
+    'directory': os.getenv("SCANNER_CASSETTE_DIR", "cassettes"),
+    'latency_ms': float(os.getenv("SCANNER_REPLAY_LATENCY_MS", "0")),
+    'error_rate': float(os.getenv("SCANNER_REPLAY_429_RATE", "0")),
+}
+_rng = random.Random(int(os.getenv("SCANNER_REPLAY_SEED", "0")))
+_lock = threading.Lock()
+
+# Bot tokens are part of Telegram URLs and must never reach a fixture file
+_TOKEN_PATTERN = re.compile(r'/bot[^/]+/')
+
+# Telegram only ever answers with a small acknowledgement, so replay can
+# stand in for it even when nothing was recorded
+_TELEGRAM_HOST = "api.telegram.org"
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when no recording exists for a request."""
+
+
+class ReplayResponse:
+    """The subset of requests.Response the clients rely on."""
+
+    def __init__(self, url, status_code, body, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.text = body
+        self.content = body.encode('utf-8')
+        self.headers = headers or {}
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def configure(mode=None, directory=None, latency_ms=None, error_rate=None, seed=None):
+    """Overrides the environment configuration at runtime (used by benchmarks)."""
+    if mode is not None:
+        _config['mode'] = mode
+    if directory is not None:
+        _config['directory'] = directory
+    if latency_ms is not None:
+        _config['latency_ms'] = latency_ms
+    if error_rate is not None:
+        _config['error_rate'] = error_rate
+    if seed is not None:
+        _rng.seed(seed)
+
+
+def get_mode():
+    return _config['mode']
+
+
+def polite_sleep(seconds, stage='sleep'):
+    """Sleeps between upstream calls, except when replaying from disk."""
+    if _config['mode'] != 'replay':
+        with instrumentation.span(stage):
+            time.sleep(seconds)
+
+
+def _redact(url):
+    return _TOKEN_PATTERN.sub('/bot<redacted>/', url)
+
+
+def _path(kind, key_material):
+    key = hashlib.sha1(key_material.encode('utf-8')).hexdigest()[:20]
+    return os.path.join(_config['directory'], kind, f"{key}.json")
+
+
+def _load(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save(path, entry):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, indent=1, default=str)
+    os.replace(tmp_path, path)
+
+
+def _inject_latency():
+    if _config['latency_ms'] > 0:
+        time.sleep(_config['latency_ms'] / 1000)
+
+
+def _should_throttle():
+    if _config['error_rate'] <= 0:
+        return False
+    with _lock:
+        return _rng.random() < _config['error_rate']
+
+
+def _throttled_response(url):
+    body = json.dumps({
+        "ok": False,
+        "error_code": 429,
+        "description": "Too Many Requests: retry after 1",
+        "parameters": {"retry_after": 1}
+    })
+    return ReplayResponse(url, 429, body, {"Retry-After": "1"})
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        # Absent, or given as an HTTP date
+        return None
+
+
+def _host(url):
+    return url.split('://', 1)[-1].split('/', 1)[0]
+
+
+def request(method, url, session=None, **kwargs):
+    """
+    Performs an HTTP request, recording or replaying it per SCANNER_CASSETTE.
+
+    Args:
+        method (str): HTTP method.
+        url (str): Request URL.
+        session (requests.Session): Optional pooled session to send through.
+        **kwargs: Passed to requests (headers, json, timeout, ...).
+
+    Returns:
+        requests.Response or ReplayResponse.
+    """
+    host = _host(url)
+    start = time.perf_counter()
+    response = None
+    try:
+        response = _request(method, url, session, **kwargs)
+        return response
+    finally:
+        instrumentation.record_http(
+            host, time.perf_counter() - start,
+            len(response.content) if response is not None else 0,
+            response.status_code if response is not None else None
+        )
+
+
+def _request(method, url, session, **kwargs):
+    mode = _config['mode']
+    redacted = _redact(url)
+    path = _path('http', f"{method.upper()} {redacted}")
+
+    if mode == 'replay':
+        _inject_latency()
+        if _should_throttle():
+            return _throttled_response(redacted)
+        entry = _load(path)
+        if entry is None:
+            if _host(url) == _TELEGRAM_HOST:
+                return ReplayResponse(redacted, 200, json.dumps({"ok": True, "result": {}}))
+            raise CassetteMiss(f"No recording for {method.upper()} {redacted}")
+        return ReplayResponse(redacted, entry['status_code'], entry['body'], entry.get('headers'))
+
+    # Imported here so replayed runs and CLI start-up don't pay for requests
+    import requests
+    from clients import throttle
+
+    host = _host(url)
+    throttle.acquire(host)
+    response = (session or requests).request(method, url, **kwargs)
+    throttle.report(host, response.status_code, _retry_after(response))
+    if mode == 'off':
+        return response
+
+    _save(path, {
+        'method': method.upper(),
+        'url': redacted,
+        'status_code': response.status_code,
+        'headers': {k: v for k, v in response.headers.items() if k.lower() in ('content-type', 'retry-after')},
+        'body': response.text
+    })
+    return response
+
+
+def _call_key(name, func, args, kwargs):
+    def encode(value):
+        if hasattr(value, 'to_dict'):
+            return value.to_dict()
+        return str(value)
+    # Bound by parameter name with defaults filled in, so f(x, True),
+    # f(x, extended_info=True) and f(ticker=x, extended_info=True) share a key
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return f"{name} {json.dumps(dict(bound.arguments), sort_keys=True, default=encode)}"
+
+
+def recorded(name, host, miss=None):
+    """
+    Records or replays the return value of a client function.
+
+    Used for calls that go through third-party libraries (yfinance, Gemini)
+    whose HTTP traffic can't be captured by ``request()``. Return values
+    must be JSON-serializable.
+
+    Args:
+        name (str): Fixture namespace, e.g. 'yahoo.get_stock_data'.
+        host (str): Upstream host the call is attributed to in metrics.
+        miss: Value returned in replay mode when nothing was recorded,
+            mirroring what the function returns on upstream errors.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            status = None
+            try:
+                with instrumentation.span(name):
+                    result = _recorded_call(name, miss, func, args, kwargs)
+                status = 200
+                return result
+            finally:
+                instrumentation.record_http(host, time.perf_counter() - start, status=status)
+        return wrapper
+    return decorator
+
+
+def _recorded_call(name, miss, func, args, kwargs):
+    mode = _config['mode']
+    if mode == 'off':
+        return func(*args, **kwargs)
+
+    path = _path(name, _call_key(name, func, args, kwargs))
+    if mode == 'replay':
+        _inject_latency()
+        entry = _load(path)
+        if entry is None:
+            print(f"No recording for {name}{args}, using stand-in")
+            return miss() if callable(miss) else miss
+        return entry['result']
+
+    result = func(*args, **kwargs)
+    _save(path, {'call': name, 'result': result})
+    return result
@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+_spans = {}
+_http = {}
+_caches = {}
+
+
+def _http_entry(host):
+    entry = _http.get(host)
+    if entry is None:
+        entry = {'calls': 0, 'bytes': 0, 'retries': 0, 'errors': 0, 'seconds': 0.0}
+        _http[host] = entry
+    return entry
+
+
+@contextmanager
+def span(stage):
+    """
+    Times a pipeline stage. Nested spans are recorded independently, so a
+    parent's time includes its children's.
+
+    Args:
+        stage (str): Dotted stage name, e.g. 'analyze.news'.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            entry = _spans.setdefault(stage, {'calls': 0, 'seconds': 0.0, 'max': 0.0})
+            entry['calls'] += 1
+            entry['seconds'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+
+
+def record_http(host, seconds, nbytes=0, status=None):
+    """Records one upstream call; a status of 400+ (or None on failure) counts as an error."""
+    with _lock:
+        entry = _http_entry(host)
+        entry['calls'] += 1
+        entry['bytes'] += nbytes
+        entry['seconds'] += seconds
+        if status is None or status >= 400:
+            entry['errors'] += 1
+
+
+def record_retry(host):
+    with _lock:
+        _http_entry(host)['retries'] += 1
+
+
+def record_cache(cache, hit):
+    with _lock:
+        entry = _caches.setdefault(cache, {'hits': 0, 'misses': 0})
+        entry['hits' if hit else 'misses'] += 1
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _http.clear()
+        _caches.clear()
+
+
+def snapshot():
+    """
+    Returns a copy of all metrics collected in this process.
+
+    Returns:
+        dict: {'spans': {...}, 'http': {...}, 'caches': {...}}
+    """
+    with _lock:
+        return {
+            'spans': {k: dict(v) for k, v in _spans.items()},
+            'http': {k: dict(v) for k, v in _http.items()},
+            'caches': {k: dict(v) for k, v in _caches.items()},
+        }
+
+
+def total_requests():
+    with _lock:
+        return sum(entry['calls'] for entry in _http.values())
+
+
+def format_summary():
+    """Formats the collected metrics as a plain-text profile report."""
+    data = snapshot()
+    lines = ["Stage                          Calls    Total(s)    Max(s)"]
+    for stage, entry in sorted(data['spans'].items(), key=lambda kv: -kv[1]['seconds']):
+        lines.append(f"{stage:<30} {entry['calls']:>5} {entry['seconds']:>11.3f} {entry['max']:>9.3f}")
+
+    lines.append("")
+    lines.append("Upstream host                  Calls   Bytes      Retries Errors  Time(s)")
+    for host, entry in sorted(data['http'].items()):
+        lines.append(f"{host:<30} {entry['calls']:>5} {entry['bytes']:>10} {entry['retries']:>7} "
+                     f"{entry['errors']:>6} {entry['seconds']:>8.3f}")
+
+    if data['caches']:
+        lines.append("")
+        lines.append("Cache                          Hits  Misses  Hit rate")
+        for cache, entry in sorted(data['caches'].items()):
+            total = entry['hits'] + entry['misses']
+            rate = entry['hits'] / total if total else 0.0
+            lines.append(f"{cache:<30} {entry['hits']:>5} {entry['misses']:>7} {rate:>8.0%}")
+    return "\n".join(lines)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def prometheus_text():
+    """Renders the collected metrics in the Prometheus text exposition format."""
+    data = snapshot()
+    families = [
+        ('scanner_stage_seconds_total', 'counter', 'Time spent in each pipeline stage.',
+         'stage', data['spans'], 'seconds'),
+        ('scanner_stage_calls_total', 'counter', 'Times each pipeline stage ran.',
+         'stage', data['spans'], 'calls'),
+        ('scanner_http_requests_total', 'counter', 'Upstream calls per host.',
+         'host', data['http'], 'calls'),
+        ('scanner_http_bytes_total', 'counter', 'Response bytes received per host.',
+         'host', data['http'], 'bytes'),
+        ('scanner_http_retries_total', 'counter', 'Retried upstream calls per host.',
+         'host', data['http'], 'retries'),
+        ('scanner_http_errors_total', 'counter', 'Failed or throttled upstream calls per host.',
+         'host', data['http'], 'errors'),
+        ('scanner_http_seconds_total', 'counter', 'Time spent waiting on each host.',
+         'host', data['http'], 'seconds'),
+        ('scanner_cache_hits_total', 'counter', 'Cache hits per cache.',
+         'cache', data['caches'], 'hits'),
+        ('scanner_cache_misses_total', 'counter', 'Cache misses per cache.',
+         'cache', data['caches'], 'misses'),
+    ]
+
+    lines = []
+    for name, kind, help_text, label, series, field in families:
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key, entry in sorted(series.items()):
+            lines.append(f'{name}{{{label}="{_escape(key)}"}} {entry[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    """Writes the Prometheus export atomically (e.g. for node_exporter's textfile collector)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
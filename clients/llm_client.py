@@ -1,38 +1,48 @@
-from google import genai
 import os
 from dotenv import load_dotenv
+from clients import cassette
 
 load_dotenv()
 
-# Configure Gemini Client
-api_key = os.getenv("GEMINI_API_KEY")
-client = None
-if api_key:
-    client = genai.Client(api_key=api_key)
+# The Gemini SDK is slow to import, so the client is created on first use
+_client = None
 
+def get_client():
+    """Returns the shared Gemini client, or None if GEMINI_API_KEY is not set."""
+    global _client
+    if _client is None:
+        api_key = os.getenv("GEMINI_API_KEY")
+        if api_key:
+            from google import genai
+            _client = genai.Client(api_key=api_key)
+    return _client
+
+@cassette.recorded('gemini.analyze_with_llm', host="generativelanguage.googleapis.com",
+                   miss="_(Replayed run: no recorded AI report for this input.)_")
 def analyze_with_llm(ticker, stock_data, reddit_posts, news_items):
     """
     Uses Gemini to analyze stock data, reddit discussions, and news.
     
     Args:
         ticker (str): Stock ticker symbol.
-        stock_data (dict): Market data (price, change, volume).
-        reddit_posts (list): List of reddit post dictionaries.
+        stock_data (Quote): Market data (price, change, volume).
+        reddit_posts (list): List of reddit Post records.
         news_items (list): List of news item dictionaries.
         
     Returns:
         str: The LLM's analysis report.
     """
+    client = get_client()
     if not client:
         return "⚠️ Gemini API Key not found. Please set GEMINI_API_KEY in your .env file."
         
     try:
         # Prepare context for the prompt
-        market_context = f"Stock: {ticker}\nPrice: ${stock_data['current_price']}\nChange: {stock_data['change_pct']}%\nVolume: {stock_data['volume']}"
+        market_context = f"Stock: {ticker}\nPrice: ${stock_data.current_price}\nChange: {stock_data.change_pct}%\nVolume: {stock_data.volume}"
         
         reddit_context = "Reddit Discussions:\n"
         for post in reddit_posts[:5]: # Top 5 posts
-            reddit_context += f"- {post['title']} (Score: {post['score']})\n"
+            reddit_context += f"- {post.title} (Score: {post.score})\n"
             
         news_context = "Recent News:\n"
         for item in news_items[:5]: # Top 5 news
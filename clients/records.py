@@ -0,0 +1,151 @@
+REDDIT_BASE_URL = "https://www.reddit.com"
+
+
+class Post:
+    """A Reddit post, keeping only the fields the scanner uses."""
+
+    __slots__ = ('title', 'body', 'permalink', 'score', 'created', 'subreddit')
+
+    def __init__(self, title, body, permalink, score, created, subreddit):
+        self.title = title
+        self.body = body
+        self.permalink = permalink
+        self.score = score
+        self.created = created
+        self.subreddit = subreddit
+
+    @classmethod
+    def from_listing(cls, post_data, subreddit):
+        """Builds a Post from one child of a Reddit listing's JSON."""
+        return cls(
+            post_data.get('title', ''),
+            post_data.get('selftext', ''),
+            post_data.get('permalink', ''),
+            post_data.get('score', 0),
+            post_data.get('created_utc'),
+            subreddit
+        )
+
+    @property
+    def url(self):
+        return f"{REDDIT_BASE_URL}{self.permalink}"
+
+    @property
+    def text(self):
+        return f"{self.title} {self.body}"
+
+    def to_dict(self):
+        return {
+            'title': self.title,
+            'url': self.url,
+            'score': self.score,
+            'body': self.body,
+            'created': self.created,
+            'subreddit': self.subreddit
+        }
+
+
+class Quote:
+    """Market data for one symbol, as returned by get_quote()."""
+
+    __slots__ = ('symbol', 'current_price', 'change_pct', 'volume', 'currency',
+                 'short_float', 'avg_volume', 'market_cap', 'trading_day')
+
+    def __init__(self, symbol, current_price, change_pct, volume, currency=None,
+                 short_float=None, avg_volume=None, market_cap=None, trading_day=None):
+        self.symbol = symbol
+        self.current_price = current_price
+        self.change_pct = change_pct
+        self.volume = volume
+        self.currency = currency
+        self.short_float = short_float
+        self.avg_volume = avg_volume
+        self.market_cap = market_cap
+        # Exchange-local date (YYYY-MM-DD) of the session the price belongs to
+        self.trading_day = trading_day
+
+    @classmethod
+    def from_dict(cls, symbol, data):
+        """Builds a Quote from a get_stock_data() dict; None stays None."""
+        if data is None:
+            return None
+        return cls(
+            symbol,
+            data['current_price'],
+            data['change_pct'],
+            data['volume'],
+            data.get('currency'),
+            data.get('short_float'),
+            data.get('avg_volume'),
+            data.get('market_cap'),
+            data.get('trading_day')
+        )
+
+    def to_dict(self):
+        data = {
+            'current_price': self.current_price,
+            'change_pct': self.change_pct,
+            'volume': self.volume,
+            'currency': self.currency
+        }
+        # Extended fields are only present when they were fetched
+        for field in ('short_float', 'avg_volume', 'market_cap', 'trading_day'):
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = value
+        return data
+
+
+class TickerAnalysis:
+    """The combined market, sentiment and LLM analysis for one ticker."""
+
+    __slots__ = ('ticker', 'market_data', 'reddit_score', 'news_score',
+                 'reddit_post_count', 'news_item_count', 'llm_report', 'price_history',
+                 'reddit_weighted_score')
+
+    def __init__(self, ticker, market_data, reddit_score, news_score,
+                 reddit_post_count, news_item_count, llm_report=None, price_history=None,
+                 reddit_weighted_score=None):
+        self.ticker = ticker
+        self.market_data = market_data
+        self.reddit_score = reddit_score
+        self.news_score = news_score
+        self.reddit_post_count = reddit_post_count
+        self.news_item_count = news_item_count
+        self.llm_report = llm_report
+        # Multi-day returns from the local history store, if it has the symbol
+        self.price_history = price_history
+        # Engagement-weighted, time-decayed Reddit sentiment; falls back to the plain mean
+        self.reddit_weighted_score = reddit_score if reddit_weighted_score is None else reddit_weighted_score
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuilds an analysis from its to_dict() form."""
+        sentiment = data.get('sentiment', {})
+        return cls(
+            data['ticker'],
+            Quote.from_dict(data['ticker'], data.get('market_data')),
+            sentiment.get('reddit_score', 0),
+            sentiment.get('news_score', 0),
+            sentiment.get('reddit_post_count', 0),
+            sentiment.get('news_item_count', 0),
+            data.get('llm_report'),
+            data.get('price_history'),
+            sentiment.get('reddit_weighted_score')
+        )
+
+    def to_dict(self):
+        """Returns the JSON-ready form used by `scanner_cli --mode analyze`."""
+        return {
+            "ticker": self.ticker,
+            "market_data": self.market_data.to_dict() if self.market_data else None,
+            "sentiment": {
+                "reddit_score": round(self.reddit_score, 2),
+                "reddit_weighted_score": round(self.reddit_weighted_score, 2),
+                "news_score": round(self.news_score, 2),
+                "reddit_post_count": self.reddit_post_count,
+                "news_item_count": self.news_item_count
+            },
+            "price_history": self.price_history,
+            "llm_report": self.llm_report
+        }
@@ -1,126 +1,219 @@
-import requests
 import re
+import threading
 from collections import Counter
-import time
+from clients import cassette, dedup, instrumentation, reddit_scheduler, throttle
+from clients.cache import TTLCache
+from clients.records import Post
 
 # User Agent is still required by Reddit to avoid strict rate limiting
 HEADERS = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'}
 
-def get_trending_tickers(subreddits=['wallstreetbets', 'stocks', 'investing', 'valueinvesting'], limit=100):
+# Listings are shared between the trending scan and every per-ticker search
+# in the same run, so each subreddit page is downloaded once rather than once
+# per ticker. Keyed by (tuple of subreddits, request budget).
+LISTING_TTL = 120
+_listing_cache = TTLCache(ttl=LISTING_TTL)
+_scan_lock = threading.Lock()
+# Posts per listing request; Reddit's maximum, and one request whatever the size
+PAGE_SIZE = 100
+
+TICKER_PATTERN = re.compile(r'\b[A-Z]{3,5}\b|\$[A-Z]{2,5}')
+TICKER_BLACKLIST = {
+    'I', 'A', 'AND', 'THE', 'FOR', 'IS', 'TO', 'IN', 'OF', 'IT', 'YOU', 'THAT', 'ON', 'WITH', 'ARE', 'WAS', 
+    'THIS', 'TEXT', 'POST', 'YOLO', 'DD', 'WSB', 'USA', 'VIEW', 'POLL', 'AM', 'PM', 'EDIT', 'NEW', 'BUY', 
+    'SELL', 'HOLD', 'GDP', 'CEO', 'CFO', 'CTO', 'IRA', 'ETF', 'IRS', 'SEC', 'IPO', 'COVID', 'FOMC', 'EPS', 
+    'P/E', 'YTD', 'ATH', 'AI', 'EV', 'SAAS', 'ROI', 'FYI', 'KPI', 'ERP', 'ARPU', 'CAGR', 'YOY', 'QOQ'
+}
+
+def extract_tickers(text):
+    """
+    Extracts candidate ticker symbols from free text.
+    
+    Args:
+        text (str): Post title and/or body.
+        
+    Returns:
+        list: Ticker symbols (without '$'), one entry per mention.
+    """
+    cleaned_matches = []
+    for m in TICKER_PATTERN.findall(text):
+        m = m.replace('$', '')
+        if m not in TICKER_BLACKLIST:
+            cleaned_matches.append(m)
+    return cleaned_matches
+
+def _fetch_listing(sub, sort, limit=PAGE_SIZE, delay=1.0):
+    """
+    Fetches one page of a subreddit listing.
+
+    Args:
+        sub (str): Subreddit name.
+        sort (str): 'hot' or 'new'.
+        limit (int): Number of posts to request (max 100).
+        delay (float): Seconds to sleep after a network fetch, to be nice to Reddit.
+
+    Returns:
+        tuple: (posts, fresh), where fresh is False if the posts are the last
+        good copy because Reddit failed or throttled the request.
+    """
+    limit = min(limit, 100)
+    url = f"https://www.reddit.com/r/{sub}/{sort}.json?limit={limit}"
+    last_good_key = f"reddit.listing:{sub}/{sort}"
+    try:
+        response = cassette.request("GET", url, headers=HEADERS)
+    except throttle.CircuitOpen as e:
+        print(f"Skipping r/{sub}/{sort}: {e}")
+        response = None
+
+    posts = []
+    fresh = response is not None and response.status_code == 200
+    if fresh:
+        data = response.json()
+        children = data.get('data', {}).get('children', [])
+        posts = [Post.from_listing(post['data'], sub) for post in children]
+        throttle.remember(last_good_key, [[p.title, p.body, p.permalink, p.score, p.created] for p in posts])
+    else:
+        if response is not None:
+            print(f"Error fetching r/{sub}/{sort}: Status {response.status_code}")
+        # While Reddit is throttling us, the last good copy beats an empty scan
+        recalled = throttle.recall(last_good_key)
+        if recalled:
+            print(f"Using cached r/{sub}/{sort} listing")
+            posts = [Post(*row, sub) for row in recalled[:limit]]
+        if response is None:
+            return posts, fresh
+
+    # Be nice to Reddit's servers
+    cassette.polite_sleep(delay, 'reddit.sleep')
+    return posts, fresh
+
+def _recall_listing(sub, sort):
+    """Returns the stored copy of a listing, or [], for subreddits skipped this scan."""
+    recalled = throttle.recall(f"reddit.listing:{sub}/{sort}", max_age=reddit_scheduler.MAX_STALENESS)
+    return [Post(*row, sub) for row in recalled] if recalled else []
+
+def scan_listings(subreddits=None, budget=None):
+    """
+    Returns the Hot and New listings of every subreddit for this scan.
+
+    Only the subreddits chosen by the scheduler are fetched; the rest get
+    their last stored listing, or nothing if there is none, so a scan never
+    costs more than its request budget. The result is shared for
+    LISTING_TTL by the trending scan and every per-ticker search with the
+    same subreddits and budget.
+
+    Args:
+        subreddits (list): Subreddit names; defaults to REDDIT_SUBREDDITS.
+        budget (int): Requests to spend; defaults to REDDIT_REQUEST_BUDGET.
+
+    Returns:
+        dict: (subreddit, sort) -> list of Post records, PAGE_SIZE at most.
+    """
+    subreddits = tuple(subreddits or reddit_scheduler.configured_subreddits())
+    budget = reddit_scheduler.request_budget() if budget is None else budget
+    with _scan_lock:
+        listings = _listing_cache.get((subreddits, budget))
+        instrumentation.record_cache('reddit.listing', listings is not None)
+        if listings is not None:
+            return listings
+
+        schedule = reddit_scheduler.load_schedule()
+        polled = set(reddit_scheduler.plan_polls(subreddits, schedule, budget, PAGE_SIZE))
+
+        listings = {}
+        for sub in subreddits:
+            for sort in reddit_scheduler.POLL_SORTS:
+                try:
+                    if sub in polled:
+                        posts, fresh = _fetch_listing(sub, sort)
+                        # A fallback copy says nothing about the arrival rate since the last poll
+                        if fresh and sort == 'new':
+                            reddit_scheduler.observe(schedule, sub, posts)
+                    else:
+                        posts = _recall_listing(sub, sort)
+                except Exception as e:
+                    print(f"Error scanning r/{sub}/{sort}: {e}")
+                    posts = []
+                listings[(sub, sort)] = posts
+
+        reddit_scheduler.save_schedule(schedule)
+        _listing_cache.set((subreddits, budget), listings)
+        return listings
+
+def get_trending_tickers(subreddits=None, limit=100, budget=None):
     """
     Scans subreddits for trending stock tickers using public JSON feeds.
     
+    Listings come from scan_listings(), so only the subreddits chosen by
+    the scheduler are fetched.
+    
     Args:
-        subreddits (list): List of subreddit names.
-        limit (int): Approximate number of posts to scan (Reddit JSON usually returns 25 per request).
+        subreddits (list): Subreddit names; defaults to REDDIT_SUBREDDITS.
+        limit (int): Posts to scan per listing (at most PAGE_SIZE).
+        budget (int): Requests to spend; defaults to REDDIT_REQUEST_BUDGET.
         
     Returns:
         list: A list of tuples (ticker, count).
     """
+    listings = scan_listings(subreddits, budget)
+
     ticker_counts = Counter()
-    ticker_pattern = re.compile(r'\b[A-Z]{3,5}\b|\$[A-Z]{2,5}')
-    blacklist = {
-        'I', 'A', 'AND', 'THE', 'FOR', 'IS', 'TO', 'IN', 'OF', 'IT', 'YOU', 'THAT', 'ON', 'WITH', 'ARE', 'WAS', 
-        'THIS', 'TEXT', 'POST', 'YOLO', 'DD', 'WSB', 'USA', 'VIEW', 'POLL', 'AM', 'PM', 'EDIT', 'NEW', 'BUY', 
-        'SELL', 'HOLD', 'GDP', 'CEO', 'CFO', 'CTO', 'IRA', 'ETF', 'IRS', 'SEC', 'IPO', 'COVID', 'FOMC', 'EPS', 
-        'P/E', 'YTD', 'ATH', 'AI', 'EV', 'SAAS', 'ROI', 'FYI', 'KPI', 'ERP', 'ARPU', 'CAGR', 'YOY', 'QOQ'
-    }
-
-    for sub in subreddits:
-        try:
-             # Scan both Hot and New for trending to catch breaking news/memes vs sustained discussions
-            urls = [
-                f"https://www.reddit.com/r/{sub}/hot.json?limit={min(limit, 100)}",
-                f"https://www.reddit.com/r/{sub}/new.json?limit={min(limit, 100)}"
-            ]
-            
-            for url in urls:
-                response = requests.get(url, headers=HEADERS)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    children = data.get('data', {}).get('children', [])
-                    
-                    for post in children:
-                        post_data = post['data']
-                        title = post_data.get('title', '')
-                        selftext = post_data.get('selftext', '')
-                        
-                        text = f"{title} {selftext}"
-                        matches = ticker_pattern.findall(text)
-                        
-                        cleaned_matches = []
-                        for m in matches:
-                            m = m.replace('$', '')
-                            if m not in blacklist:
-                                cleaned_matches.append(m)
-                        ticker_counts.update(cleaned_matches)
-                else:
-                    print(f"Error fetching r/{sub}: Status {response.status_code}")
-                
-               # Be nice to Reddit's servers
-                time.sleep(1)
-            
-        except Exception as e:
-            print(f"Error scanning r/{sub}: {e}")
+    # A post listed in both Hot and New, or crossposted to another sub,
+    # only counts once
+    seen = set()
+    duplicates = dedup.NearDuplicateIndex()
+
+    # Hot and New together catch breaking news/memes as well as sustained discussions
+    for posts in listings.values():
+        for post in posts[:limit]:
+            if post.permalink in seen:
+                continue
+            seen.add(post.permalink)
+            if duplicates.add(post.permalink, post.text) is None:
+                ticker_counts.update(extract_tickers(post.text))
 
     return ticker_counts.most_common(10)
 
-def get_ticker_discussions(ticker, subreddits=['wallstreetbets', 'stocks', 'investing', 'valueinvesting'], limit=20):
+def get_ticker_discussions(ticker, subreddits=None, limit=20):
     """
     Fetches posts related to a ticker from the front pages of subreddits.
     Note: Without API, we cannot effectively 'search' history, so we scan Hot/New.
+    The listings are this scan's from scan_listings(), so searches cost no
+    requests beyond the scan's budget.
     
     Args:
         ticker (str): Stock ticker to look for.
+        subreddits (list): Subreddit names; defaults to REDDIT_SUBREDDITS.
+        limit (int): Maximum number of posts to return.
         
     Returns:
-        list: List of dictionaries with post details.
+        list: Post records, highest score first.
     """
+    listings = scan_listings(subreddits)
     posts = []
     # Clean ticker for regex matching
     target_ticker = ticker.replace('$', '').upper()
     
-    for sub in subreddits:
+    for sub in dict.fromkeys(sub for sub, _ in listings):
         try:
             # Check both Hot and New to find relevant recent discussions
-            urls = [
-                f"https://www.reddit.com/r/{sub}/hot.json?limit=50",
-                f"https://www.reddit.com/r/{sub}/new.json?limit=25"
-            ]
-            
-            for url in urls:
-                response = requests.get(url, headers=HEADERS)
-                if response.status_code == 200:
-                    data = response.json()
-                    children = data.get('data', {}).get('children', [])
-                    
-                    for post in children:
-                        post_data = post['data']
-                        title = post_data.get('title', '')
-                        selftext = post_data.get('selftext', '')
-                        
-                        # Check if ticker is in title or body
-                        if target_ticker in title.upper() or target_ticker in selftext.upper():
-                            posts.append({
-                                'title': title,
-                                'url': f"https://www.reddit.com{post_data.get('permalink')}",
-                                'score': post_data.get('score', 0),
-                                'body': selftext,
-                                'created': post_data.get('created_utc'),
-                                'subreddit': sub
-                            })
-                            
-                time.sleep(0.5)
+            for sort, page_size in (('hot', 50), ('new', 25)):
+                for post in listings[(sub, sort)][:page_size]:
+                    # Check if ticker is in title or body
+                    if target_ticker in post.title.upper() or target_ticker in post.body.upper():
+                        posts.append(post)
                 
         except Exception as e:
             print(f"Error searching r/{sub}: {e}")
             
     # Deduplicate posts based on URL
-    unique_posts_dict = {p['url']: p for p in posts}
+    unique_posts_dict = {p.permalink: p for p in posts}
     unique_posts = list(unique_posts_dict.values())
     
     # Sort by score descending
-    unique_posts.sort(key=lambda x: x['score'], reverse=True)
+    unique_posts.sort(key=lambda x: x.score, reverse=True)
+
+    # Crossposts keep only their highest-scored copy, so they're scored once
+    unique_posts = dedup.unique(unique_posts, text=lambda p: p.text)
     
     return unique_posts[:limit]
@@ -0,0 +1,163 @@
+"""
+Decides which subreddits a trending scan polls.
+
+Each subreddit's post arrival rate is learned from the gaps between
+``created_utc`` times in its New listing, smoothed with an EWMA. A scan
+spends a fixed request budget (REDDIT_REQUEST_BUDGET) on the subreddits
+expected to have the most posts since their last poll: rate times time
+since the last poll, capped at one page, since posts beyond a page are
+missed anyway. Subreddits never polled before, or not polled for
+MAX_STALENESS, go first. Each poll costs the same, so picking greedily by
+expected new posts captures the most posts for the budget.
+
+Subreddits come from REDDIT_SUBREDDITS (comma-separated). Learned rates
+are kept in REDDIT_SCHEDULE_FILE between runs.
+
+Usage:
+    python -m clients.reddit_scheduler --subreddits wallstreetbets,stocks --budget 4
+"""
+import argparse
+import json
+import os
+import time
+from clients import cassette
+
+DEFAULT_SUBREDDITS = ['wallstreetbets', 'stocks', 'investing', 'valueinvesting']
+SCHEDULE_PATH = os.getenv("REDDIT_SCHEDULE_FILE", os.path.join("data", "reddit_schedule.json"))
+
+# Listings fetched per poll; the budget is in requests, so a poll costs len(POLL_SORTS)
+POLL_SORTS = ('hot', 'new')
+DEFAULT_BUDGET = 8
+# Weight of the newest rate observation in the EWMA
+RATE_SMOOTHING = 0.3
+# Floor on the learned rate (posts/second), about one post a day
+MIN_RATE = 1 / 86400
+# Every subreddit is polled at least this often, however slow it looks
+MAX_STALENESS = 6 * 3600
+
+
+def configured_subreddits():
+    """Returns the subreddits to scan, from REDDIT_SUBREDDITS or the defaults."""
+    raw = os.getenv("REDDIT_SUBREDDITS", "")
+    subreddits = [s.strip() for s in raw.split(',') if s.strip()]
+    return subreddits or list(DEFAULT_SUBREDDITS)
+
+
+def request_budget():
+    """Returns the per-scan request budget, from REDDIT_REQUEST_BUDGET."""
+    return int(os.getenv("REDDIT_REQUEST_BUDGET", str(DEFAULT_BUDGET)))
+
+
+def load_schedule(path=SCHEDULE_PATH):
+    """
+    Loads the learned per-subreddit state.
+
+    Replayed runs start from an empty state every time, so they stay
+    deterministic.
+
+    Returns:
+        dict: subreddit -> {'rate': posts/second, 'last_polled': unix time}
+    """
+    if cassette.get_mode() == 'replay':
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_schedule(schedule, path=SCHEDULE_PATH):
+    if cassette.get_mode() == 'replay':
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(schedule, f, indent=2)
+    os.replace(tmp, path)
+
+
+def expected_new_posts(state, page_size, now=None):
+    """Expected posts since the last poll, capped at one page; None if never polled."""
+    if not state or 'last_polled' not in state:
+        return None
+    elapsed = (now or time.time()) - state['last_polled']
+    return min(state.get('rate', MIN_RATE) * elapsed, page_size)
+
+
+def plan_polls(subreddits, schedule, budget, page_size=100, now=None):
+    """
+    Picks the subreddits to poll this scan.
+
+    Args:
+        subreddits (list): Configured subreddits.
+        schedule (dict): State from load_schedule().
+        budget (int): Requests available this scan.
+        page_size (int): Posts per listing request.
+        now (float): Current unix time.
+
+    Returns:
+        list: Subreddits to poll, most valuable first. A budget too small
+        for one full poll still polls one subreddit, so new subreddits
+        always get a listing eventually.
+    """
+    now = now or time.time()
+
+    def priority(sub):
+        state = schedule.get(sub)
+        expected = expected_new_posts(state, page_size, now)
+        # Unknown subreddits, then long-unpolled ones (stalest first), outrank any expected yield
+        if expected is None:
+            return (2, 0)
+        if now - state['last_polled'] >= MAX_STALENESS:
+            return (1, now - state['last_polled'])
+        return (0, expected)
+
+    polls = max(budget // len(POLL_SORTS), 1)
+    return sorted(subreddits, key=priority, reverse=True)[:polls]
+
+
+def observe(schedule, sub, posts, now=None):
+    """
+    Updates a subreddit's arrival rate from a freshly fetched New listing.
+
+    Args:
+        schedule (dict): State from load_schedule(); updated in place.
+        sub (str): Subreddit name.
+        posts (list): Posts from its New listing.
+        now (float): Poll time.
+    """
+    state = schedule.setdefault(sub, {})
+    state['last_polled'] = now or time.time()
+
+    created = sorted(p.created for p in posts if p.created)
+    if len(created) < 2:
+        return
+    span = created[-1] - created[0]
+    # n posts over the span between the oldest and newest is n - 1 gaps
+    rate = max((len(created) - 1) / span, MIN_RATE) if span > 0 else state.get('rate', MIN_RATE)
+    previous = state.get('rate')
+    state['rate'] = rate if previous is None else RATE_SMOOTHING * rate + (1 - RATE_SMOOTHING) * previous
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show learned subreddit rates and the next poll plan")
+    parser.add_argument("--subreddits", help="Comma-separated subreddits (default: REDDIT_SUBREDDITS)")
+    parser.add_argument("--budget", type=int, default=None, help="Requests per scan (default: REDDIT_REQUEST_BUDGET)")
+    args = parser.parse_args()
+
+    subreddits = [s.strip() for s in args.subreddits.split(',')] if args.subreddits else configured_subreddits()
+    schedule = load_schedule()
+    budget = request_budget() if args.budget is None else args.budget
+    plan = plan_polls(subreddits, schedule, budget)
+    now = time.time()
+
+    print(f"Budget: {budget} requests ({len(plan)} of {len(subreddits)} subreddits)\n")
+    print("Subreddit               Posts/hour   Last poll   Expected   Next scan")
+    for sub in subreddits:
+        state = schedule.get(sub, {})
+        expected = expected_new_posts(state, 100, now)
+        last = f"{(now - state['last_polled']) / 60:.0f} min ago" if 'last_polled' in state else "never"
+        rate = f"{state['rate'] * 3600:.1f}" if 'rate' in state else "-"
+        print(f"{sub:<22} {rate:>11}   {last:>10}   {'-' if expected is None else f'{expected:.0f}':>8}   "
+              f"{'poll' if sub in plan else 'cached'}")
@@ -1,38 +1,358 @@
-import requests
+import asyncio
 import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from clients import cassette, instrumentation
 
 load_dotenv()
 
-def send_telegram_message(message):
+# Telegram rejects messages longer than this (counted after entity parsing,
+# so staying under it with the raw Markdown is always safe)
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+# Bot API limits: ~30 messages/second overall, ~1 message/second per chat
+GLOBAL_RATE_PER_SEC = 30
+CHAT_RATE_PER_SEC = 1
+
+MAX_RETRIES = 3
+REQUEST_TIMEOUT = 15
+CODE_FENCE = "```"
+TELEGRAM_HOST = "api.telegram.org"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
+    """Returns the shared, connection-pooled HTTP session for the Bot API."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=32)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+
+def split_message(message, limit=TELEGRAM_MAX_MESSAGE_LENGTH):
     """
-    Sends a message to the configured Telegram chat.
-    
+    Splits a Markdown message into chunks that fit Telegram's length limit.
+
+    Splits happen on line boundaries so inline entities stay intact. A code
+    block that straddles a split is closed at the end of one chunk and
+    reopened (with its language tag) at the start of the next, and a block
+    the message never closes is closed in its last chunk, so every chunk
+    renders on its own. Lines longer than a chunk are hard-wrapped.
+
     Args:
-        message (str): The text message to send.
+        message (str): The full Markdown message.
+        limit (int): Maximum characters per chunk.
+
+    Returns:
+        list: Message chunks, in order.
     """
-    token = os.getenv("TELEGRAM_BOT_TOKEN")
-    chat_id = os.getenv("TELEGRAM_CHAT_ID")
-    
-    if not token or not chat_id:
-        print("⚠️ Telegram credentials not found. Please set TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID in .env")
-        return False
-        
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    payload = {
-        "chat_id": chat_id,
-        "text": message,
-        "parse_mode": "Markdown"
-    }
-    
-    try:
-        response = requests.post(url, json=payload)
-        if response.status_code == 200:
-            print("✅ Telegram message sent successfully.")
-            return True
-        else:
-            print(f"❌ Failed to send Telegram message: {response.text}")
+    if len(message) <= limit:
+        return [message]
+
+    fence_line = CODE_FENCE + "\n"
+    chunks = []
+    current = ""
+    # The line that opened the current code block (None outside one), and
+    # where it starts in `current`
+    opening = None
+    opened_at = 0
+
+    def close(chunk):
+        return chunk + ("" if chunk.endswith("\n") else "\n") + fence_line
+
+    for line in message.splitlines(keepends=True):
+        # Hard-wrap lines that could never fit in a chunk on their own, leaving
+        # room to reopen and close a code block around them
+        max_piece = limit - len(opening or fence_line) - len(fence_line) - 1
+        pieces = [line[i:i + max_piece] for i in range(0, len(line), max_piece)]
+
+        for piece in pieces:
+            is_fence = piece.strip().startswith(CODE_FENCE)
+            # A chunk that ends inside a code block needs room to close it
+            reserve = len(fence_line) + 1 if (opening is not None) != is_fence else 0
+
+            if current and len(current) + len(piece) + reserve > limit:
+                if opening is None:
+                    chunks.append(current)
+                    current = ""
+                elif len(current) - opened_at == len(opening):
+                    # Nothing in the block yet, so open it in the next chunk instead
+                    if current[:opened_at].strip():
+                        chunks.append(current[:opened_at])
+                    current = opening
+                else:
+                    chunks.append(close(current))
+                    current = opening
+                opened_at = 0
+
+            if is_fence and opening is None:
+                opening = piece if piece.endswith("\n") else piece + "\n"
+                opened_at = len(current)
+            elif is_fence:
+                opening = None
+            current += piece
+
+    if opening is not None:
+        # An unclosed block would make Telegram reject the chunk's Markdown
+        current = close(current)
+    if current.strip():
+        chunks.append(current)
+
+    return chunks
+
+
+class AsyncRateLimiter:
+    """Token bucket shared by all coroutines running on one event loop."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        """Blocks all acquirers for `seconds` (used when Telegram returns 429)."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class TelegramDeliveryQueue:
+    """
+    Delivers rendered messages to many chats over a pooled HTTP session.
+
+    Each chat is a job on an asyncio queue. Workers send a chat's chunks in
+    order while per-chat and global token buckets keep the bot under
+    Telegram's flood limits. 429 responses are retried after the server's
+    `retry_after`.
+    """
+
+    def __init__(self, token, global_rate=GLOBAL_RATE_PER_SEC, chat_rate=CHAT_RATE_PER_SEC,
+                 max_retries=MAX_RETRIES, workers=8):
+        self.url = f"https://{TELEGRAM_HOST}/bot{token}/sendMessage"
+        self.global_limiter = AsyncRateLimiter(global_rate)
+        self.chat_rate = chat_rate
+        self.chat_limiters = {}
+        self.max_retries = max_retries
+        self.workers = workers
+
+    def _chat_limiter(self, chat_id):
+        limiter = self.chat_limiters.get(chat_id)
+        if limiter is None:
+            limiter = AsyncRateLimiter(self.chat_rate, burst=1)
+            self.chat_limiters[chat_id] = limiter
+        return limiter
+
+    async def _post(self, payload):
+        session = _get_session()
+        return await asyncio.to_thread(cassette.request, "POST", self.url, session=session,
+                                       json=payload, timeout=REQUEST_TIMEOUT)
+
+    async def _send_chunk(self, chat_id, text):
+        payload = {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": "Markdown"
+        }
+        limiter = self._chat_limiter(chat_id)
+
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire()
+            await self.global_limiter.acquire()
+            try:
+                response = await self._post(payload)
+            except requests.RequestException as e:
+                print(f"❌ Error sending Telegram message to {chat_id}: {e}")
+                instrumentation.record_retry(TELEGRAM_HOST)
+                await asyncio.sleep(2 ** attempt)
+                continue
+
+            if response.status_code == 200:
+                return True
+
+            if response.status_code == 429:
+                try:
+                    retry_after = response.json().get('parameters', {}).get('retry_after', 1)
+                except ValueError:
+                    retry_after = 1
+                print(f"⏳ Telegram rate limited chat {chat_id}, retrying in {retry_after}s")
+                instrumentation.record_retry(TELEGRAM_HOST)
+                # Flood limits apply to the whole bot, so every worker backs off
+                limiter.pause(retry_after)
+                self.global_limiter.pause(retry_after)
+                continue
+
+            if response.status_code == 400 and "parse entities" in response.text and "parse_mode" in payload:
+                # Malformed Markdown: deliver as plain text rather than not at all
+                payload.pop("parse_mode")
+                instrumentation.record_retry(TELEGRAM_HOST)
+                continue
+
+            if response.status_code >= 500:
+                instrumentation.record_retry(TELEGRAM_HOST)
+                await asyncio.sleep(2 ** attempt)
+                continue
+
+            print(f"❌ Failed to send Telegram message to {chat_id}: {response.text}")
             return False
-    except Exception as e:
-        print(f"❌ Error sending Telegram message: {e}")
+
+        print(f"❌ Giving up on Telegram chat {chat_id} after {self.max_retries} retries")
         return False
+
+    async def _worker(self, queue, results):
+        while True:
+            chat_id, chunks = await queue.get()
+            try:
+                ok = True
+                for chunk in chunks:
+                    if not await self._send_chunk(chat_id, chunk):
+                        ok = False
+                        break
+                results[chat_id] = ok
+            finally:
+                queue.task_done()
+
+    async def deliver(self, chat_ids, message):
+        """
+        Sends one rendered message to every chat in `chat_ids`.
+
+        Args:
+            chat_ids (list): Telegram chat ids.
+            message (str): The Markdown message; split if too long.
+
+        Returns:
+            dict: chat_id -> True if every chunk was delivered.
+        """
+        return await self.deliver_many({chat_id: message for chat_id in chat_ids})
+
+    async def deliver_many(self, messages):
+        """
+        Sends a different rendered message to each chat.
+
+        Args:
+            messages (dict): chat_id -> Markdown message.
+
+        Returns:
+            dict: chat_id -> True if every chunk was delivered.
+        """
+        queue = asyncio.Queue()
+        results = {}
+        for chat_id, message in messages.items():
+            queue.put_nowait((chat_id, split_message(message)))
+
+        workers = [asyncio.create_task(self._worker(queue, results))
+                   for _ in range(min(self.workers, max(queue.qsize(), 1)))]
+        await queue.join()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        return results
+
+
+def get_subscribed_chat_ids():
+    """
+    Returns the chat ids configured for delivery.
+
+    Reads the comma-separated TELEGRAM_CHAT_IDS, falling back to the single
+    TELEGRAM_CHAT_ID.
+    """
+    raw = os.getenv("TELEGRAM_CHAT_IDS") or os.getenv("TELEGRAM_CHAT_ID") or ""
+    return [chat_id.strip() for chat_id in raw.split(",") if chat_id.strip()]
+
+
+async def deliver_messages_async(messages):
+    """
+    Sends per-chat messages through the delivery queue.
+
+    For callers already running an event loop (e.g. the API server).
+
+    Args:
+        messages (dict): chat_id -> Markdown message.
+
+    Returns:
+        dict: chat_id -> True if delivered, or None if credentials are missing.
+    """
+    token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not token:
+        print("⚠️ Telegram credentials not found. Please set TELEGRAM_BOT_TOKEN in .env")
+        return None
+
+    results = await TelegramDeliveryQueue(token).deliver_many(messages)
+    sent = sum(1 for ok in results.values() if ok)
+    if sent:
+        print(f"✅ Telegram message sent to {sent}/{len(results)} chat(s).")
+    return results
+
+
+def deliver_messages(messages):
+    """
+    Blocking wrapper around deliver_messages_async() for scripts.
+
+    Starts its own event loop, so it can't be called from inside one;
+    async code should await deliver_messages_async() instead.
+
+    Args:
+        messages (dict): chat_id -> Markdown message.
+
+    Returns:
+        dict: chat_id -> True if delivered, or None if credentials are missing.
+    """
+    return asyncio.run(deliver_messages_async(messages))
+
+
+def broadcast_message(message, chat_ids=None):
+    """
+    Sends one message to many chats.
+
+    Args:
+        message (str): The Markdown message to send.
+        chat_ids (list): Target chats; defaults to the configured subscribers.
+
+    Returns:
+        dict: chat_id -> True if delivered, or None if credentials are missing.
+    """
+    chat_ids = chat_ids or get_subscribed_chat_ids()
+    if not chat_ids:
+        print("⚠️ Telegram credentials not found. Please set TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID in .env")
+        return None
+    return deliver_messages({chat_id: message for chat_id in chat_ids})
+
+
+def send_telegram_message(message, chat_id=None):
+    """
+    Sends a message to the configured Telegram chat(s).
+
+    Args:
+        message (str): The text message to send.
+        chat_id (str): Optional single target; defaults to the configured chats.
+
+    Returns:
+        bool: True if every target received the full message.
+    """
+    results = broadcast_message(message, [chat_id] if chat_id else None)
+    return bool(results) and all(results.values())
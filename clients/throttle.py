@@ -0,0 +1,219 @@
+"""
+Rate limiting and circuit breaking shared by every scanner process.
+
+The dashboard, the cron digest and ad-hoc CLI runs all talk to Yahoo and
+Reddit, so their request budgets live in one SQLite file (SCANNER_THROTTLE_DB,
+default ``data/throttle.sqlite3``) rather than in process memory.
+
+Each backend (Reddit, Yahoo) gets one token bucket, shared by all its hosts
+(HOST_BUCKETS), whose rate adapts AIMD-style: every successful (2xx/3xx)
+response adds RATE_STEP requests/second up to the bucket's ceiling, and
+every 429/503 halves it down to its floor. Other errors (403, 404, 5xx) say
+nothing about our rate and leave it alone. After BREAKER_THRESHOLD throttled
+responses in a row the bucket's circuit opens for BREAKER_COOLDOWN seconds
+(or the server's Retry-After), and ``acquire()`` fails fast with CircuitOpen
+instead of sending. Once the cooldown passes requests go out again; one
+success closes the circuit, one more failure re-opens it.
+
+Clients store their last good responses with ``remember()`` and fall back to
+``recall()`` while a host is throttling them. Replayed runs neither read nor
+write this store, so they stay deterministic.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from clients import cassette, instrumentation
+
+DB_PATH = os.getenv("SCANNER_THROTTLE_DB", os.path.join("data", "throttle.sqlite3"))
+
+# bucket -> (starting rate, floor, ceiling) in requests per second
+BUCKET_LIMITS = {
+    'reddit': (1.0, 0.05, 2.0),
+    'yahoo': (2.0, 0.1, 5.0),
+}
+# Hosts in front of the same backend share its rate limit, so they share a
+# bucket and breaker: a 429 from query1 slows query2 (yfinance) too
+HOST_BUCKETS = {
+    'www.reddit.com': 'reddit',
+    'query1.finance.yahoo.com': 'yahoo',
+    'query2.finance.yahoo.com': 'yahoo',
+}
+BURST = 5
+RATE_STEP = 0.05
+THROTTLED_STATUSES = (429, 503)
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 60
+# acquire() fails fast rather than sleep longer than this for a slot
+MAX_WAIT = 30
+# Cached responses older than this are not served
+LAST_GOOD_MAX_AGE = 6 * 3600
+
+_local = threading.local()
+
+
+class CircuitOpen(Exception):
+    """Raised by acquire() while a host's circuit breaker is open."""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"{host} is throttling us; retrying in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def _connect():
+    # sqlite3 connections can't be shared across threads, so keep one per thread
+    conn = getattr(_local, 'conn', None)
+    if conn is None or getattr(_local, 'path', None) != DB_PATH:
+        os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS hosts (
+            host TEXT PRIMARY KEY, rate REAL, tokens REAL, updated REAL,
+            failures INTEGER, open_until REAL)""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS last_good (
+            key TEXT PRIMARY KEY, value TEXT, stored REAL)""")
+        _local.conn, _local.path = conn, DB_PATH
+    return conn
+
+
+def _load_bucket(conn, bucket, now):
+    row = conn.execute("SELECT rate, tokens, updated, failures, open_until FROM hosts WHERE host = ?",
+                       (bucket,)).fetchone()
+    if row is None:
+        return [BUCKET_LIMITS[bucket][0], BURST, now, 0, 0.0]
+    return list(row)
+
+
+def _store_bucket(conn, bucket, state):
+    conn.execute("INSERT OR REPLACE INTO hosts VALUES (?, ?, ?, ?, ?, ?)", (bucket, *state))
+
+
+def acquire(host, max_wait=MAX_WAIT):
+    """
+    Waits for the host's next request slot.
+
+    Hosts without an entry in HOST_BUCKETS are not limited.
+
+    Args:
+        host (str): Host about to be called.
+        max_wait (float): Longest the caller is willing to sleep for a slot.
+
+    Raises:
+        CircuitOpen: If the host's breaker is open, or the next slot is more
+            than `max_wait` seconds away.
+    """
+    bucket = HOST_BUCKETS.get(host)
+    if bucket is None:
+        return
+    conn = _connect()
+    now = time.time()
+    # IMMEDIATE takes the write lock up front so two processes can't both
+    # spend the same token
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rate, tokens, updated, failures, open_until = _load_bucket(conn, bucket, now)
+        if open_until > now:
+            raise CircuitOpen(host, open_until - now)
+        tokens = min(BURST, tokens + (now - updated) * rate) - 1
+        # A negative balance reserves a slot in the future; wait for it
+        wait = -tokens / rate if tokens < 0 else 0
+        if wait > max_wait:
+            # Backed up too far to be worth waiting; let the caller serve cached data
+            raise CircuitOpen(host, wait)
+        _store_bucket(conn, bucket, [rate, tokens, now, failures, open_until])
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    if wait > 0:
+        time.sleep(wait)
+
+
+def report(host, status, retry_after=None):
+    """
+    Adapts the rate of the host's bucket to a response.
+
+    Args:
+        host (str): Host that answered.
+        status (int): HTTP status; 429 and 503 count as throttling, 2xx and
+            3xx as success, and anything else leaves the rate unchanged.
+        retry_after (float): The server's Retry-After, in seconds, if any.
+    """
+    bucket = HOST_BUCKETS.get(host)
+    if bucket is None:
+        return
+    if status not in THROTTLED_STATUSES and not 200 <= status < 400:
+        return
+    _, floor, ceiling = BUCKET_LIMITS[bucket]
+    conn = _connect()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rate, tokens, updated, failures, open_until = _load_bucket(conn, bucket, now)
+        if status in THROTTLED_STATUSES:
+            rate = max(floor, rate / 2)
+            failures += 1
+            cooldown = retry_after or 0
+            if failures >= BREAKER_THRESHOLD:
+                cooldown = max(cooldown, BREAKER_COOLDOWN)
+            if cooldown:
+                open_until = now + cooldown
+                print(f"Circuit open for {host} for {cooldown:.0f}s")
+        else:
+            rate = min(ceiling, rate + RATE_STEP)
+            failures = 0
+        _store_bucket(conn, bucket, [rate, tokens, updated, failures, open_until])
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def is_rate_limit_error(error):
+    """True if a library call (yfinance) failed because the host throttled us."""
+    # yfinance raises YFRateLimitError on 429s; older versions only say so in the message
+    return type(error).__name__ == 'YFRateLimitError' or 'Too Many Requests' in str(error)
+
+
+def host_state(host):
+    """
+    Returns the shared state of a host's bucket.
+
+    Returns:
+        dict: rate, tokens, failures and seconds until the circuit closes.
+    """
+    rate, tokens, _, failures, open_until = _load_bucket(_connect(), HOST_BUCKETS[host], time.time())
+    return {'rate': rate, 'tokens': tokens, 'failures': failures,
+            'open_for': max(open_until - time.time(), 0)}
+
+
+def remember(key, value):
+    """Stores a JSON-serializable response as the last good value for `key`."""
+    if cassette.get_mode() == 'replay':
+        return
+    try:
+        _connect().execute("INSERT OR REPLACE INTO last_good VALUES (?, ?, ?)",
+                           (key, json.dumps(value), time.time()))
+    except (sqlite3.Error, TypeError, ValueError) as e:
+        print(f"Error caching {key}: {e}")
+
+
+def recall(key, max_age=LAST_GOOD_MAX_AGE):
+    """
+    Returns the last good value stored for `key`.
+
+    Returns:
+        The value, or None if nothing was stored within `max_age` seconds.
+    """
+    if cassette.get_mode() == 'replay':
+        return None
+    try:
+        row = _connect().execute("SELECT value, stored FROM last_good WHERE key = ?", (key,)).fetchone()
+    except sqlite3.Error as e:
+        print(f"Error reading cached {key}: {e}")
+        row = None
+    hit = row is not None and time.time() - row[1] <= max_age
+    instrumentation.record_cache('throttle.last_good', hit)
+    return json.loads(row[0]) if hit else None
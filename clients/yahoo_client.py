@@ -1,6 +1,11 @@
-import yfinance as yf
-import pandas as pd
+from datetime import datetime, timezone
+from clients import cassette, throttle
+from clients.records import Quote
 
+# yfinance and yahooquery calls are attributed to this host in metrics
+YFINANCE_HOST = "query2.finance.yahoo.com"
+
+@cassette.recorded('yahoo.get_stock_news', host=YFINANCE_HOST, miss=list)
 def get_stock_news(ticker):
     """
     Fetches the latest news for a given stock ticker.
@@ -11,17 +16,30 @@ def get_stock_news(ticker):
     Returns:
         list: A list of dictionaries containing news items, sorted by time.
     """
+    # yfinance pulls in pandas and is slow to import; only load it when needed
+    import yfinance as yf
+    last_good_key = f"yahoo.news:{ticker}"
     try:
+        throttle.acquire(YFINANCE_HOST)
         stock = yf.Ticker(ticker)
         news = stock.news
+        throttle.report(YFINANCE_HOST, 200)
         # Sort by publication time descending (newest first)
         if news:
             news.sort(key=lambda x: x.get('providerPublishTime', 0), reverse=True)
+            throttle.remember(last_good_key, news)
         return news
+    except throttle.CircuitOpen as e:
+        print(f"{e}; using cached news for {ticker}")
+        return throttle.recall(last_good_key) or []
     except Exception as e:
         print(f"Error fetching news for {ticker}: {e}")
+        if throttle.is_rate_limit_error(e):
+            throttle.report(YFINANCE_HOST, 429)
+            return throttle.recall(last_good_key) or []
         return []
 
+@cassette.recorded('yahoo.get_stock_data', host=YFINANCE_HOST)
 def get_stock_data(ticker, extended_info=False):
     """
     Fetches real-time market data for a given stock ticker.
@@ -33,7 +51,10 @@ def get_stock_data(ticker, extended_info=False):
     Returns:
         dict: A dictionary containing market data.
     """
+    import yfinance as yf
+    last_good_key = f"yahoo.quote:{ticker}:{int(extended_info)}"
     try:
+        throttle.acquire(YFINANCE_HOST)
         stock = yf.Ticker(ticker)
         # fast_info is often faster for real-time data
         info = stock.fast_info
@@ -81,11 +102,85 @@ def get_stock_data(ticker, extended_info=False):
                 data['short_float'] = 0
                 data['avg_volume'] = 0
 
+        throttle.report(YFINANCE_HOST, 200)
+        throttle.remember(last_good_key, data)
         return data
+    except throttle.CircuitOpen as e:
+        # Fail fast instead of adding to the 429s; a recent quote is better than none
+        print(f"{e}; using cached data for {ticker}")
+        return throttle.recall(last_good_key)
     except Exception as e:
         print(f"Error fetching data for {ticker}: {e}")
+        if throttle.is_rate_limit_error(e):
+            throttle.report(YFINANCE_HOST, 429)
+            return throttle.recall(last_good_key)
         return None
 
+def get_quote(ticker, extended_info=False):
+    """
+    Fetches market data for a ticker as a Quote record.
+    
+    Args:
+        ticker (str): The stock ticker symbol.
+        extended_info (bool): Whether to fetch slower, extended data like Short Interest.
+        
+    Returns:
+        Quote: The quote, or None if no data is available.
+    """
+    return Quote.from_dict(ticker, get_stock_data(ticker, extended_info))
+
+# Yahoo's spark endpoint answers for up to this many symbols per request
+SPARK_BATCH_SIZE = 20
+
+def get_batch_quotes(symbols):
+    """
+    Fetches current quotes for many symbols, SPARK_BATCH_SIZE per request.
+
+    Much cheaper than get_quote() per symbol when polling a watchlist, but
+    without the extended fields (short float, market cap).
+
+    Args:
+        symbols (list): Ticker symbols.
+
+    Returns:
+        dict: symbol -> Quote, for the symbols Yahoo returned a price for.
+    """
+    quotes = {}
+    for i in range(0, len(symbols), SPARK_BATCH_SIZE):
+        batch = symbols[i:i + SPARK_BATCH_SIZE]
+        url = ("https://query1.finance.yahoo.com/v7/finance/spark"
+               f"?symbols={','.join(batch)}&range=1d&interval=1d")
+        try:
+            response = cassette.request("GET", url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
+            if response.status_code != 200:
+                print(f"Error fetching quotes for {', '.join(batch)}: Status {response.status_code}")
+                continue
+            results = response.json().get('spark', {}).get('result') or []
+        except Exception as e:
+            print(f"Error fetching quotes for {', '.join(batch)}: {e}")
+            continue
+
+        for result in results:
+            try:
+                meta = result['response'][0]['meta']
+            except (KeyError, IndexError, TypeError):
+                continue
+            price = meta.get('regularMarketPrice')
+            if price is None:
+                continue
+            prev_close = meta.get('chartPreviousClose') or meta.get('previousClose')
+            change_pct = (price - prev_close) / prev_close * 100 if prev_close else 0.0
+            market_time = meta.get('regularMarketTime')
+            trading_day = None
+            if market_time:
+                # Shift by the exchange's UTC offset so the date is the session's, not ours
+                trading_day = datetime.fromtimestamp(market_time + (meta.get('gmtoffset') or 0),
+                                                     timezone.utc).strftime('%Y-%m-%d')
+            quotes[result['symbol']] = Quote(result['symbol'], float(price), float(change_pct),
+                                             int(meta.get('regularMarketVolume') or 0), meta.get('currency'),
+                                             trading_day=trading_day)
+    return quotes
+
 def get_yahoo_trending():
     """
     Fetches trending stocks from Yahoo Finance.
@@ -104,8 +199,7 @@ def get_yahoo_trending():
             'Upgrade-Insecure-Requests': '1',
             'Cache-Control': 'max-age=0'
         }
-        import requests
-        response = requests.get(url, headers=headers)
+        response = cassette.request("GET", url, headers=headers)
         
         if response.status_code == 200:
             data = response.json()
@@ -120,12 +214,15 @@ def get_yahoo_trending():
                     if not (symbol.endswith('-USD') or symbol.endswith('-CAD') or 
                             symbol.endswith('-EUR') or symbol.endswith('=X')):
                         stocks_only.append(q)
+                throttle.remember("yahoo.trending", stocks_only)
                 return stocks_only
-        return []
+            return []
+        return throttle.recall("yahoo.trending") or []
     except Exception as e:
         print(f"Error fetching Yahoo trending: {e}")
-        return []
+        return throttle.recall("yahoo.trending") or []
 
+@cassette.recorded('yahoo.get_market_news', host=YFINANCE_HOST, miss=list)
 def get_market_news():
     """
     Fetches general market news using yahooquery (more reliable for search/news).
@@ -0,0 +1,231 @@
+import argparse
+import os
+import time
+import numpy as np
+from clients import cassette, throttle
+from clients.yahoo_client import YFINANCE_HOST
+
+HISTORY_DIR = os.getenv("SCANNER_HISTORY_DIR", os.path.join("data", "history"))
+
+# One fixed-size record per bar, so a symbol's file is a flat array that can
+# be memory-mapped directly and grown by appending bytes
+BAR_DTYPE = np.dtype([
+    ('ts', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+# How far back the first download goes; Yahoo caps intraday history
+INITIAL_PERIOD = {
+    '1d': '5y',
+    '1h': '730d',
+    '15m': '60d',
+    '5m': '60d',
+}
+
+# Returns and averages are only served while the newest bar is this recent,
+# so a store nobody has updated doesn't pass off old moves as current ones
+MAX_BAR_AGE = {
+    '1d': 5 * 86400,
+    '1h': 4 * 86400,
+    '15m': 4 * 86400,
+    '5m': 4 * 86400,
+}
+
+# Bars stamped before this (2000-01-01) can only come from a unit mix-up
+MIN_VALID_TS = 946684800
+
+_maps = {}
+
+
+def _path(symbol, interval):
+    return os.path.join(HISTORY_DIR, interval, f"{symbol.upper()}.bin")
+
+
+@cassette.recorded('yahoo.history', host=YFINANCE_HOST, miss=list)
+def fetch_bars(symbol, interval='1d', start_ts=None):
+    """
+    Downloads OHLCV bars from Yahoo Finance.
+
+    Args:
+        symbol (str): Ticker symbol.
+        interval (str): Bar size, e.g. '1d' or '1h'.
+        start_ts (int): Unix time of the first bar wanted; None downloads the
+            full INITIAL_PERIOD.
+
+    Returns:
+        list: [ts, open, high, low, close, volume] rows, oldest first.
+    """
+    import yfinance as yf
+    try:
+        throttle.acquire(YFINANCE_HOST)
+        stock = yf.Ticker(symbol)
+        if start_ts is None:
+            df = stock.history(period=INITIAL_PERIOD.get(interval, '1y'), interval=interval, auto_adjust=False)
+        else:
+            df = stock.history(start=start_ts, interval=interval, auto_adjust=False)
+        if df is None or df.empty:
+            return []
+
+        throttle.report(YFINANCE_HOST, 200)
+        # The index unit varies (ns in pandas 2, often s in pandas 3), so convert explicitly
+        timestamps = df.index.as_unit('s').asi8
+        return [
+            [int(ts), float(o), float(h), float(l), float(c), float(v)]
+            for ts, o, h, l, c, v in zip(timestamps, df['Open'], df['High'], df['Low'],
+                                          df['Close'], df['Volume'])
+        ]
+    except Exception as e:
+        # The stored history is the fallback, so a throttled update just waits for the next run
+        print(f"Error fetching history for {symbol}: {e}")
+        if throttle.is_rate_limit_error(e):
+            throttle.report(YFINANCE_HOST, 429)
+        return []
+
+
+def load_history(symbol, interval='1d'):
+    """
+    Returns a symbol's stored bars as a read-only memory-mapped array.
+
+    The map is reused until the file grows, so repeated lookups cost a stat
+    call rather than a read.
+
+    Args:
+        symbol (str): Ticker symbol.
+        interval (str): Bar size.
+
+    Returns:
+        numpy.ndarray: Structured array with BAR_DTYPE fields (may be empty).
+    """
+    path = _path(symbol, interval)
+    try:
+        size = os.stat(path).st_size
+    except FileNotFoundError:
+        return np.empty(0, dtype=BAR_DTYPE)
+
+    cached = _maps.get(path)
+    if cached is not None and cached[0] == size:
+        return cached[1]
+
+    count = size // BAR_DTYPE.itemsize
+    if count == 0:
+        return np.empty(0, dtype=BAR_DTYPE)
+    bars = np.memmap(path, dtype=BAR_DTYPE, mode='r', shape=(count,))
+    _maps[path] = (size, bars)
+    return bars
+
+
+def update_symbol(symbol, interval='1d'):
+    """
+    Brings one symbol's history up to date.
+
+    The first call downloads the full initial period. Later calls download
+    only from the last stored bar onward; that bar is rewritten (it may have
+    been a partial bar) and newer bars are appended.
+
+    Returns:
+        int: Number of bars written.
+    """
+    path = _path(symbol, interval)
+    existing = load_history(symbol, interval)
+    if len(existing) and existing['ts'][-1] < MIN_VALID_TS:
+        # Written with broken timestamps by an earlier version; download it again
+        print(f"Rebuilding {symbol} {interval} history")
+        existing = existing[:0]
+    last_ts = int(existing['ts'][-1]) if len(existing) else None
+
+    rows = fetch_bars(symbol, interval, last_ts)
+    if not rows:
+        return 0
+
+    new = np.array([tuple(row) for row in rows], dtype=BAR_DTYPE)
+    new = new[np.argsort(new['ts'], kind='stable')]
+    if last_ts is not None:
+        new = new[new['ts'] >= last_ts]
+        if not len(new):
+            return 0
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    start = len(existing)
+    if last_ts is not None and new['ts'][0] == last_ts:
+        start -= 1
+
+    with open(path, 'r+b' if last_ts is not None else 'wb') as f:
+        f.seek(start * BAR_DTYPE.itemsize)
+        f.write(new.tobytes())
+        # Drops any torn partial record left by an interrupted earlier write
+        f.truncate()
+    return len(new)
+
+
+def update_history(symbols, interval='1d'):
+    """
+    Updates many symbols' histories.
+
+    Returns:
+        dict: symbol -> bars written.
+    """
+    written = {}
+    for symbol in symbols:
+        written[symbol] = update_symbol(symbol, interval)
+    return written
+
+
+def load_recent_history(symbol, interval='1d'):
+    """
+    Returns a symbol's stored bars, or an empty array if the newest bar is
+    older than MAX_BAR_AGE for the interval.
+    """
+    bars = load_history(symbol, interval)
+    if len(bars) and time.time() - bars['ts'][-1] > MAX_BAR_AGE.get(interval, MAX_BAR_AGE['1d']):
+        return bars[:0]
+    return bars
+
+
+def get_return_pct(symbol, days, interval='1d'):
+    """
+    Returns the percent change in close over the last `days` bars.
+
+    Reads only the local store; returns None if there isn't enough history
+    or it is out of date.
+    """
+    close = load_recent_history(symbol, interval)['close']
+    if len(close) <= days or close[-1 - days] == 0:
+        return None
+    return float((close[-1] / close[-1 - days] - 1) * 100)
+
+
+def get_avg_volume(symbol, days=20, interval='1d'):
+    """Returns the mean volume over the last `days` bars, or None without recent history."""
+    volume = load_recent_history(symbol, interval)['volume']
+    if not len(volume):
+        return None
+    return float(volume[-days:].mean())
+
+
+def get_returns(symbol, windows=(5, 20)):
+    """
+    Returns multi-day returns from the local store.
+
+    Returns:
+        dict: e.g. {'return_5d_pct': 2.1, 'return_20d_pct': -4.0}, or None if
+        the symbol has no stored history.
+    """
+    returns = {f"return_{days}d_pct": get_return_pct(symbol, days) for days in windows}
+    if all(value is None for value in returns.values()):
+        return None
+    return returns
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download or update local OHLCV history")
+    parser.add_argument("symbols", nargs="+", help="Ticker symbols")
+    parser.add_argument("--interval", default="1d", choices=sorted(INITIAL_PERIOD), help="Bar size")
+    args = parser.parse_args()
+
+    for symbol, count in update_history([s.upper() for s in args.symbols], args.interval).items():
+        total = len(load_history(symbol, args.interval))
+        print(f"{symbol}: wrote {count} bars ({total} stored)")
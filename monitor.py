@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime
+from clients import cassette
+from clients.instrumentation import span, total_requests, format_summary
+from clients.telegram_client import get_subscribed_chat_ids, deliver_messages
+from clients.yahoo_client import get_batch_quotes
+from subscribers import load_subscribers
+
+MONITOR_INTERVAL = 60
+# Reddit listings are cached for two minutes, so re-scoring more often finds nothing new
+SENTIMENT_INTERVAL = 300
+STATE_PATH = os.getenv("MONITOR_STATE_FILE", os.path.join("data", "monitor_state.json"))
+
+# Alert again each time the day's move crosses another multiple of this
+MOVE_THRESHOLD_PCT = 3.0
+# Day volume as a multiple of the 20-day average
+VOLUME_RATIO = 2.0
+
+
+def load_watchlist(symbols=None):
+    """
+    Maps each monitored symbol to the chats that want its alerts.
+
+    Args:
+        symbols (list): Explicit symbols, alerted to every subscribed chat.
+            Without them, each subscriber's watchlist is monitored for that
+            subscriber.
+
+    Returns:
+        dict: symbol -> list of chat ids.
+    """
+    if symbols:
+        chat_ids = get_subscribed_chat_ids()
+        return {s.replace('$', '').upper(): chat_ids for s in symbols}
+
+    watchlist = {}
+    for subscriber in load_subscribers():
+        for symbol in subscriber['watchlist']:
+            watchlist.setdefault(symbol, []).append(subscriber['chat_id'])
+    return watchlist
+
+
+def load_state(path=STATE_PATH):
+    """Loads the previous cycle's per-symbol rule state, so restarts don't re-alert."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _trading_day(quote):
+    # Quotes without a session date fall back to our own calendar day
+    return quote.trading_day or date.today().isoformat()
+
+
+def evaluate_rules(symbol, quote, avg_volume=None, sentiment_score=None, previous=None):
+    """
+    Applies the alert rules to one symbol against its previous state.
+
+    Each rule keeps a small state and only alerts when it changes: the move
+    rule when the day's change crosses a further multiple of
+    MOVE_THRESHOLD_PCT, the volume rule when volume first reaches
+    VOLUME_RATIO times its average, and the sentiment rule when Reddit
+    sentiment flips between bullish and bearish. The move and volume states
+    are per session: on a new trading day they start over, so the same
+    move or spike alerts again.
+
+    Args:
+        symbol (str): Ticker symbol.
+        quote (Quote): Current quote.
+        avg_volume (float): 20-day average volume, or None to skip the volume rule.
+        sentiment_score (float): Fresh weighted sentiment, or None to keep the last.
+        previous (dict): This symbol's state from the last cycle.
+
+    Returns:
+        tuple: (new state dict, list of alert lines)
+    """
+    from sentiment import SENTIMENT_THRESHOLD
+    previous = previous or {}
+    day = _trading_day(quote)
+    state = {'price': quote.current_price, 'volume': quote.volume, 'day': day,
+             'move': int(quote.change_pct / MOVE_THRESHOLD_PCT),
+             'volume_spike': False, 'sentiment': previous.get('sentiment', 0)}
+    alerts = []
+    # Sentiment carries across sessions; the day's move and volume don't
+    same_day = previous.get('day') == day
+
+    # Further out than last time (or the other side of zero); retracing stays quiet
+    prev_move = previous.get('move', 0) if same_day else 0
+    if state['move'] and (state['move'] * prev_move <= 0 or abs(state['move']) > abs(prev_move)):
+        emoji = "🚀" if quote.change_pct > 0 else "🔻"
+        alerts.append(f"{emoji} *{symbol}* {quote.change_pct:+.1f}% at ${quote.current_price:,.2f}")
+
+    if avg_volume:
+        ratio = quote.volume / avg_volume
+        state['volume_spike'] = ratio >= VOLUME_RATIO
+        if state['volume_spike'] and not (same_day and previous.get('volume_spike')):
+            alerts.append(f"📊 *{symbol}* volume {ratio:.1f}x its 20-day average")
+
+    if sentiment_score is not None:
+        # Neutral readings keep the last side, so only a full flip alerts
+        side = 1 if sentiment_score > SENTIMENT_THRESHOLD else -1 if sentiment_score < -SENTIMENT_THRESHOLD else 0
+        if side:
+            if state['sentiment'] and side != state['sentiment']:
+                mood = "bullish 🟢" if side > 0 else "bearish 🔴"
+                alerts.append(f"🔄 *{symbol}* Reddit sentiment turned {mood} ({sentiment_score:+.2f})")
+            state['sentiment'] = side
+
+    return state, alerts
+
+
+def run_cycle(watchlist, state, with_sentiment=False, history_days=None):
+    """
+    Polls the watchlist once and returns the alerts to send.
+
+    Quotes come from batched requests and average volume from the local
+    history store, so a cycle's request count grows with the number of
+    batches rather than symbols. Symbols whose quote hasn't changed since
+    the last cycle are skipped unless sentiment is being refreshed.
+
+    Args:
+        watchlist (dict): symbol -> chat ids, from load_watchlist().
+        state (dict): symbol -> rule state; updated in place.
+        with_sentiment (bool): Whether to re-score Reddit sentiment this cycle.
+        history_days (dict): symbol -> trading day its stored history was
+            last updated; updated in place. Symbols not updated for the
+            current trading day (all of them on the first cycle) get their
+            history updated before the volume rule reads it. None skips
+            history updates.
+
+    Returns:
+        dict: chat_id -> Markdown alert message.
+    """
+    from history_store import get_avg_volume, update_history
+
+    with span('monitor.quotes'):
+        quotes = get_batch_quotes(list(watchlist))
+
+    if history_days is not None:
+        stale = [symbol for symbol, quote in quotes.items()
+                 if history_days.get(symbol) != _trading_day(quote)]
+        if stale:
+            with span('monitor.history'):
+                update_history(stale)
+            history_days.update((symbol, _trading_day(quotes[symbol])) for symbol in stale)
+
+    scores = {}
+    if with_sentiment:
+        from clients.reddit_client import get_ticker_discussions
+        from sentiment import score_posts
+        with span('monitor.sentiment'):
+            for symbol in quotes:
+                # Listings are shared across symbols, so the whole pass costs one scan's budget
+                scores[symbol] = score_posts(symbol, get_ticker_discussions(symbol, limit=20))
+
+    lines = {}
+    with span('monitor.rules'):
+        for symbol, quote in quotes.items():
+            previous = state.get(symbol)
+            if (previous and symbol not in scores and previous['price'] == quote.current_price
+                    and previous['volume'] == quote.volume):
+                continue
+            state[symbol], alerts = evaluate_rules(symbol, quote, get_avg_volume(symbol),
+                                                   scores.get(symbol), previous)
+            for chat_id in watchlist[symbol]:
+                lines.setdefault(chat_id, []).extend(alerts)
+
+    return {chat_id: "\n".join(alerts) for chat_id, alerts in lines.items() if alerts}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch a list of tickers and send Telegram alerts")
+    parser.add_argument("symbols", nargs="*", help="Tickers to watch (default: subscribers' watchlists)")
+    parser.add_argument("--interval", type=float, default=MONITOR_INTERVAL, help="Seconds between polls")
+    parser.add_argument("--no-sentiment", action="store_true", help="Skip the Reddit sentiment flip rule")
+    parser.add_argument("--once", action="store_true", help="Run a single cycle and exit")
+    parser.add_argument("--profile", action="store_true", help="Print per-stage timings on exit")
+    args = parser.parse_args()
+
+    watchlist = load_watchlist(args.symbols)
+    if not watchlist:
+        print("⚠️ Nothing to monitor. Pass tickers or add watchlists to subscribers.json")
+        sys.exit(1)
+
+    print(f"Monitoring {len(watchlist)} symbol(s) every {args.interval:.0f}s")
+    state = load_state()
+    # Empty, so the first cycle brings every symbol's history up to date
+    history_days = {}
+    next_sentiment = 0
+    try:
+        while True:
+            start = time.perf_counter()
+            requests_before = total_requests()
+            with_sentiment = not args.no_sentiment and time.monotonic() >= next_sentiment
+            if with_sentiment:
+                next_sentiment = time.monotonic() + SENTIMENT_INTERVAL
+
+            messages = run_cycle(watchlist, state, with_sentiment, history_days)
+            if messages:
+                with span('monitor.deliver'):
+                    deliver_messages(messages)
+            save_state(state)
+
+            elapsed = time.perf_counter() - start
+            print(f"[{datetime.now():%H:%M:%S}] {len(watchlist)} symbols, "
+                  f"{total_requests() - requests_before} requests, {len(messages)} alert message(s), "
+                  f"{elapsed * 1000:.0f} ms")
+            if args.once:
+                break
+            cassette.polite_sleep(max(args.interval - elapsed, 0), 'monitor.sleep')
+    except KeyboardInterrupt:
+        pass
+
+    if args.profile:
+        print(format_summary(), file=sys.stderr)
@@ -1,136 +1,179 @@
-import json
-from scanner_cli import get_trending_json, analyze_ticker_json
-from clients.telegram_client import send_telegram_message
+import argparse
+import sys
+from scanner_cli import get_trending, analyze_ticker
+from clients.telegram_client import deliver_messages
+from clients.instrumentation import span, format_summary, write_prometheus
+from subscribers import (
+    DEFAULT_SECTIONS, REDDIT_TABLE_SIZE, DEEP_DIVE_SIZE, YAHOO_TABLE_SIZE,
+    load_subscribers, collect_tickers, tickers_for_subscriber
+)
 from datetime import datetime
 
-def format_digest(trending_json):
-    """Formats the trending JSON into a rich Telegram message with tables."""
-    from clients.reddit_client import get_trending_tickers
+def analyze_tickers(tickers):
+    """
+    Analyzes each ticker once.
+
+    Args:
+        tickers (list): Distinct ticker symbols.
+
+    Returns:
+        dict: ticker -> TickerAnalysis.
+    """
+    analyses = {}
+    for ticker in tickers:
+        try:
+            analyses[ticker] = analyze_ticker(ticker)
+        except Exception as e:
+            print(f"Error analyzing {ticker}: {e}")
+    return analyses
+
+def fetch_market_news():
+    """Fetches market news once per run; returns None if the fetch fails."""
     from clients.yahoo_client import get_market_news
-    
-    data = json.loads(trending_json)
-    
-    reddit_tickers = data.get('reddit_trending', [])[:10]
-    yahoo_tickers = data.get('yahoo_trending', [])[:10]
-    
-    # Get mention counts from Reddit
-    reddit_trending_with_counts = get_trending_tickers(limit=50)
-    mention_dict = {ticker: count for ticker, count in reddit_trending_with_counts}
-    
-    msg = f"📊 **Stock Scanner Digest**\n"
-    msg += f"🕐 {datetime.now().strftime('%b %d, %Y %I:%M %p')}\n"
-    msg += "━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-    
-    # Reddit Trending Table with Mentions
-    msg += "🔥 **REDDIT TRENDING**\n"
-    msg += "```\n"
+    try:
+        return get_market_news()
+    except Exception:
+        return None
+
+def _format_price(price, width):
+    if price > 1000:
+        price_str = f"{price:.0f}"
+    elif price > 10:
+        price_str = f"{price:.1f}"
+    else:
+        price_str = f"{price:.2f}"
+    return f"{price_str:>{width}}"
+
+def _sentiment_table(tickers, analyses, mention_dict):
+    msg = "```\n"
     msg += "Ticker  Price   Chg%  Sent Ment\n"
     msg += "──────────────────────────────\n"
-    
-    for ticker in reddit_tickers[:8]:
+
+    for ticker in tickers:
         try:
-            analysis_json = analyze_ticker_json(ticker)
-            analysis = json.loads(analysis_json)
-            
-            market = analysis.get('market_data', {})
-            sentiment = analysis.get('sentiment', {})
-            
-            if not market:
+            analysis = analyses.get(ticker)
+            if not analysis or not analysis.market_data:
                 continue
-                
-            price = market.get('current_price', 0)
-            change = market.get('change_pct', 0)
-            sent_score = sentiment.get('reddit_score', 0)
+
+            price = analysis.market_data.current_price
+            change = analysis.market_data.change_pct
+            sent_score = analysis.reddit_weighted_score
             mentions = mention_dict.get(ticker, 0)
-            
-            # Format price
-            if price > 1000:
-                price_str = f"{price:.0f}"
-            elif price > 10:
-                price_str = f"{price:.1f}"
-            else:
-                price_str = f"{price:.2f}"
-            
+
             # Sentiment emoji
             sent_emoji = "🟢" if sent_score > 0.2 else "🔴" if sent_score < -0.2 else "⚪"
-            
-            msg += f"{ticker:<6} ${price_str:>5} {change:>5.1f}% {sent_emoji} {mentions:>3}\n"
+
+            msg += f"{ticker:<6} ${_format_price(price, 5)} {change:>5.1f}% {sent_emoji} {mentions:>3}\n"
         except:
             pass
-    
+
     msg += "```\n\n"
-    
+    return msg
+
+def format_digest(trending, analyses=None, sections=None, watchlist=None, market_news=None):
+    """
+    Formats the trending scan into a rich Telegram message with tables.
+
+    Args:
+        trending (dict): Output of scanner_cli.get_trending().
+        analyses (dict): ticker -> TickerAnalysis shared across digests; tickers
+            missing from it are analyzed on demand.
+        sections (list): Sections to render (see subscribers.SECTIONS).
+        watchlist (list): Tickers for the 'watchlist' section.
+        market_news (list): Pre-fetched market news; fetched if None.
+
+    Returns:
+        str: The Markdown digest.
+    """
+    sections = sections or DEFAULT_SECTIONS
+    watchlist = watchlist or []
+    analyses = analyses if analyses is not None else {}
+
+    reddit_tickers = trending.get('reddit_trending', [])[:10]
+    yahoo_tickers = trending.get('yahoo_trending', [])[:10]
+
+    # Mention counts come from the same Reddit scan as the trending list
+    mention_dict = trending.get('reddit_mentions', {})
+
+    needed = tickers_for_subscriber({'sections': sections, 'watchlist': watchlist},
+                                    reddit_tickers, yahoo_tickers)
+    analyses.update(analyze_tickers([t for t in dict.fromkeys(needed) if t not in analyses]))
+
+    msg = f"📊 **Stock Scanner Digest**\n"
+    msg += f"🕐 {datetime.now().strftime('%b %d, %Y %I:%M %p')}\n"
+    msg += "━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
+
+    # Reddit Trending Table with Mentions
+    if 'reddit' in sections:
+        msg += "🔥 **REDDIT TRENDING**\n"
+        msg += _sentiment_table(reddit_tickers[:REDDIT_TABLE_SIZE], analyses, mention_dict)
+
     # Top 3 Deep Dive
-    msg += "🎯 **TOP 3 DEEP DIVE**\n"
-    for i, ticker in enumerate(reddit_tickers[:3], 1):
-        try:
-            analysis_json = analyze_ticker_json(ticker)
-            analysis = json.loads(analysis_json)
-            
-            market = analysis.get('market_data', {})
-            sentiment = analysis.get('sentiment', {})
-            
-            if not market:
-                continue
-            
-            price = market.get('current_price', 0)
-            change = market.get('change_pct', 0)
-            short_float = market.get('short_float', 0) * 100
-            sent_reddit = sentiment.get('reddit_score', 0)
-            sent_news = sentiment.get('news_score', 0)
-            reddit_posts = sentiment.get('reddit_post_count', 0)
-            mentions = mention_dict.get(ticker, 0)
-            
-            # Change icon
-            icon = "🟢" if change >= 0 else "🔴"
-            
-            msg += f"\n**{i}. {ticker}** {icon}\n"
-            msg += f"├ Price: ${price:.2f} ({change:+.2f}%)\n"
-            msg += f"├ Mentions: {mentions} | Posts: {reddit_posts}\n"
-            msg += f"├ Short Interest: {short_float:.1f}%\n"
-            msg += f"├ Reddit Sentiment: {sent_reddit:+.2f}\n"
-            msg += f"└ News Sentiment: {sent_news:+.2f}\n"
-        except:
-            pass
-    
+    if 'deep_dive' in sections:
+        msg += "🎯 **TOP 3 DEEP DIVE**\n"
+        for i, ticker in enumerate(reddit_tickers[:DEEP_DIVE_SIZE], 1):
+            try:
+                analysis = analyses.get(ticker)
+                if not analysis or not analysis.market_data:
+                    continue
+
+                market = analysis.market_data
+                price = market.current_price
+                change = market.change_pct
+                short_float = (market.short_float or 0) * 100
+                sent_reddit = analysis.reddit_weighted_score
+                sent_news = analysis.news_score
+                reddit_posts = analysis.reddit_post_count
+                mentions = mention_dict.get(ticker, 0)
+
+                # Change icon
+                icon = "🟢" if change >= 0 else "🔴"
+
+                msg += f"\n**{i}. {ticker}** {icon}\n"
+                msg += f"├ Price: ${price:.2f} ({change:+.2f}%)\n"
+                msg += f"├ Mentions: {mentions} | Posts: {reddit_posts}\n"
+                msg += f"├ Short Interest: {short_float:.1f}%\n"
+                msg += f"├ Reddit Sentiment: {sent_reddit:+.2f}\n"
+                msg += f"└ News Sentiment: {sent_news:+.2f}\n"
+            except:
+                pass
+        msg += "\n"
+
     # Yahoo Movers with Details
-    msg += "\n━━━━━━━━━━━━━━━━━━━━━━━━\n"
-    msg += "📈 **YAHOO MOVERS**\n"
-    msg += "```\n"
-    msg += "Ticker  Price   Change%\n"
-    msg += "──────────────────────────\n"
-    
-    for ticker in yahoo_tickers[:6]:
-        try:
-            analysis_json = analyze_ticker_json(ticker)
-            analysis = json.loads(analysis_json)
-            
-            market = analysis.get('market_data', {})
-            if not market:
-                continue
-                
-            price = market.get('current_price', 0)
-            change = market.get('change_pct', 0)
-            
-            # Format price
-            if price > 1000:
-                price_str = f"{price:.0f}"
-            elif price > 10:
-                price_str = f"{price:.1f}"
-            else:
-                price_str = f"{price:.2f}"
-            
-            msg += f"{ticker:<6} ${price_str:>6} {change:>6.1f}%\n"
-        except:
-            pass
-    
-    msg += "```\n\n"
-    
+    if 'yahoo' in sections:
+        msg += "━━━━━━━━━━━━━━━━━━━━━━━━\n"
+        msg += "📈 **YAHOO MOVERS**\n"
+        msg += "```\n"
+        msg += "Ticker  Price   Change%\n"
+        msg += "──────────────────────────\n"
+
+        for ticker in yahoo_tickers[:YAHOO_TABLE_SIZE]:
+            try:
+                analysis = analyses.get(ticker)
+                if not analysis or not analysis.market_data:
+                    continue
+
+                price = analysis.market_data.current_price
+                change = analysis.market_data.change_pct
+
+                msg += f"{ticker:<6} ${_format_price(price, 6)} {change:>6.1f}%\n"
+            except:
+                pass
+
+        msg += "```\n\n"
+
+    # Subscriber Watchlist
+    if 'watchlist' in sections and watchlist:
+        msg += "👀 **WATCHLIST**\n"
+        msg += _sentiment_table(watchlist, analyses, mention_dict)
+
     # Market News
-    msg += "📰 **MARKET NEWS**\n"
-    try:
-        news_items = get_market_news()
-        if news_items:
+    if 'news' in sections:
+        msg += "📰 **MARKET NEWS**\n"
+        news_items = market_news if market_news is not None else fetch_market_news()
+        if news_items is None:
+            msg += "Unable to fetch news.\n"
+        elif news_items:
             for i, item in enumerate(news_items[:3], 1):
                 title = item.get('title', 'No title')
                 link = item.get('link', '')
@@ -140,13 +183,86 @@ def format_digest(trending_json):
                 msg += f"{i}. [{title}]({link})\n"
         else:
             msg += "No recent news available.\n"
-    except:
-        msg += "Unable to fetch news.\n"
-    
+
     return msg
 
+def build_digests(subscribers, trending, analyses=None, market_news=None):
+    """
+    Renders one digest per subscriber from a single shared analysis pass.
+
+    The union of every subscriber's tickers is analyzed once, market news is
+    fetched once, and subscribers with identical settings share one render.
+
+    Args:
+        subscribers (list): Subscriber dicts from load_subscribers().
+        trending (dict): Output of scanner_cli.get_trending().
+        analyses (dict): Optional ticker -> TickerAnalysis; filled in place so
+            the caller can reuse the analyses after rendering.
+        market_news (list): Optional market news; fetched if a digest needs it.
+
+    Returns:
+        dict: chat_id -> Markdown digest.
+    """
+    reddit_tickers = trending.get('reddit_trending', [])[:10]
+    yahoo_tickers = trending.get('yahoo_trending', [])[:10]
+
+    if analyses is None:
+        analyses = {}
+    with span('digest.analyze'):
+        tickers = collect_tickers(subscribers, reddit_tickers, yahoo_tickers)
+        analyses.update(analyze_tickers([t for t in tickers if t not in analyses]))
+    if market_news is None and any('news' in s['sections'] for s in subscribers):
+        with span('digest.news'):
+            market_news = fetch_market_news()
+
+    renders = {}
+    digests = {}
+    with span('digest.render'):
+        for subscriber in subscribers:
+            key = (tuple(subscriber['sections']), tuple(subscriber['watchlist']))
+            if key not in renders:
+                renders[key] = format_digest(trending, analyses, subscriber['sections'],
+                                             subscriber['watchlist'], market_news)
+            digests[subscriber['chat_id']] = renders[key]
+    return digests
+
 if __name__ == "__main__":
-    print("Generating digest...")
-    trending = get_trending_json()
-    message = format_digest(trending)
-    send_telegram_message(message)
+    parser = argparse.ArgumentParser(description="Send the Stock Scanner digest to Telegram")
+    parser.add_argument("--profile", action="store_true", help="Print per-stage timings and upstream call stats")
+    parser.add_argument("--metrics-file", help="Write metrics in Prometheus text format to this file")
+    parser.add_argument("--live", action="store_true", help="Ignore the scan snapshot and query live services")
+    args = parser.parse_args()
+
+    subscribers = load_subscribers()
+    if not subscribers:
+        print("⚠️ No subscribers configured. Set TELEGRAM_CHAT_ID or create subscribers.json")
+    else:
+        print(f"Generating digests for {len(subscribers)} subscriber(s)...")
+        # A fresh snapshot from snapshot.py turns the scan into a file read;
+        # only tickers it lacks are analyzed live
+        from snapshot import load_snapshot, snapshot_analyses
+        snapshot = None if args.live else load_snapshot()
+        if snapshot:
+            trending = snapshot['trending']
+            analyses = snapshot_analyses(snapshot)
+            market_news = snapshot['market_news']
+        else:
+            with span('digest.trending'):
+                trending = get_trending()
+            analyses = {}
+            market_news = None
+        digests = build_digests(subscribers, trending, analyses, market_news)
+        with span('digest.deliver'):
+            deliver_messages(digests)
+
+        # Keeps a daily sentiment record for backtest.py
+        from backtest import append_observations
+        try:
+            append_observations(analyses, trending.get('reddit_mentions'))
+        except OSError as e:
+            print(f"Error recording sentiment observations: {e}")
+
+    if args.profile:
+        print(format_summary(), file=sys.stderr)
+    if args.metrics_file:
+        write_prometheus(args.metrics_file)
@@ -1,4 +1,6 @@
 #!/bin/bash
 cd "$(dirname "$0")"
 source venv/bin/activate
+# Refresh the shared snapshot first; the digest (and the dashboard) read it
+python snapshot.py
 python notify_telegram.py
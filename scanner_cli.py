@@ -2,72 +2,113 @@ import argparse
 import json
 import sys
 from clients.reddit_client import get_trending_tickers, get_ticker_discussions
-from clients.yahoo_client import get_stock_data, get_stock_news, get_yahoo_trending
-from clients.llm_client import analyze_with_llm
-from sentiment import analyze_text
+from clients.yahoo_client import get_quote, get_stock_news, get_yahoo_trending
+from clients.records import TickerAnalysis
+from clients import dedup
+from sentiment import analyze_text, get_aggregator
+from clients.instrumentation import span, format_summary, write_prometheus
 
-def get_trending_json():
-    """Scans for trending tickers and returns JSON."""
-    try:
-        # Get Reddit Trends
+def get_trending():
+    """
+    Scans Reddit and Yahoo for trending tickers.
+    
+    Returns:
+        dict: Trending tickers per source, plus Reddit mention counts.
+    """
+    # Get Reddit Trends
+    with span('trending.reddit'):
         reddit_trends = get_trending_tickers(limit=50) # Increased limit for CLI
-        
-        # Get Yahoo Trends
+    
+    # Get Yahoo Trends
+    with span('trending.yahoo'):
         yahoo_trends_raw = get_yahoo_trending()
-        yahoo_trends = []
-        for item in yahoo_trends_raw:
-             yahoo_trends.append(item.get('symbol'))
+    yahoo_trends = []
+    for item in yahoo_trends_raw:
+         yahoo_trends.append(item.get('symbol'))
 
-        return json.dumps({
-            "source": "StockSentimentScanner",
-            "type": "trending",
-            "reddit_trending": [t[0] for t in reddit_trends], # Just list of tickers
-            "yahoo_trending": yahoo_trends
-        }, indent=2)
+    return {
+        "source": "StockSentimentScanner",
+        "type": "trending",
+        "reddit_trending": [t[0] for t in reddit_trends], # Just list of tickers
+        "reddit_mentions": dict(reddit_trends),
+        "yahoo_trending": yahoo_trends
+    }
+
+def get_trending_json():
+    """Scans for trending tickers and returns JSON."""
+    try:
+        return json.dumps(get_trending(), indent=2)
     except Exception as e:
         return json.dumps({"error": str(e)})
 
-def analyze_ticker_json(ticker, use_llm=False):
-    """Analyzes a single ticker and returns JSON."""
-    try:
-        # 1. Market Data
-        stock_data = get_stock_data(ticker, extended_info=True)
+def analyze_ticker(ticker, use_llm=False):
+    """
+    Analyzes a single ticker.
+    
+    Args:
+        ticker (str): Ticker symbol.
+        use_llm (bool): Whether to request a Gemini report.
         
-        # 2. Reddit Data
+    Returns:
+        TickerAnalysis: Market data, sentiment scores and optional LLM report.
+    """
+    # 1. Market Data
+    with span('analyze.market'):
+        stock_data = get_quote(ticker, extended_info=True)
+    
+    # 2. Reddit Data
+    with span('analyze.reddit'):
         reddit_posts = get_ticker_discussions(ticker, limit=10)
-        reddit_sentiment_score = 0
-        if reddit_posts:
-            scores = [analyze_text(p['title'] + " " + p['body'])['compound'] for p in reddit_posts]
-            reddit_sentiment_score = sum(scores) / len(scores)
+    reddit_sentiment_score = 0
+    reddit_weighted_score = 0
+    if reddit_posts:
+        aggregator = get_aggregator()
+        with span('analyze.scoring'):
+            scores = [analyze_text(p.text)['compound'] for p in reddit_posts]
+            for post, compound in zip(reddit_posts, scores):
+                aggregator.add(ticker, post, compound)
+        reddit_sentiment_score = sum(scores) / len(scores)
+        reddit_weighted_score = aggregator.score(ticker)
 
-        # 3. News Data
+    # 3. News Data
+    with span('analyze.news'):
         news_items = get_stock_news(ticker)
-        news_sentiment_score = 0
-        if news_items:
-            # Handle potential missing title
-            titles = [item.get('title', '') for item in news_items if item.get('title')]
-            if titles:
+    news_sentiment_score = 0
+    if news_items:
+        # Handle potential missing title; syndicated copies of a headline are scored once
+        titles = dedup.unique([item.get('title', '') for item in news_items if item.get('title')])
+        if titles:
+            with span('analyze.scoring'):
                 scores = [analyze_text(t)['compound'] for t in titles]
-                news_sentiment_score = sum(scores) / len(scores)
+            news_sentiment_score = sum(scores) / len(scores)
 
-        # 4. LLM Analysis
-        llm_report = None
-        if use_llm and stock_data:
+    # 4. Multi-day trend from the local history store (no download here)
+    from history_store import get_returns
+    price_history = get_returns(ticker)
+
+    # 5. LLM Analysis
+    llm_report = None
+    if use_llm and stock_data:
+        from clients.llm_client import analyze_with_llm
+        with span('analyze.llm'):
             llm_report = analyze_with_llm(ticker, stock_data, reddit_posts, news_items)
 
-        result = {
-            "ticker": ticker,
-            "market_data": stock_data,
-            "sentiment": {
-                "reddit_score": round(reddit_sentiment_score, 2),
-                "news_score": round(news_sentiment_score, 2),
-                "reddit_post_count": len(reddit_posts),
-                "news_item_count": len(news_items)
-            },
-            "llm_report": llm_report
-        }
-        return json.dumps(result, indent=2)
-        
+    return TickerAnalysis(
+        ticker,
+        stock_data,
+        reddit_sentiment_score,
+        news_sentiment_score,
+        len(reddit_posts),
+        len(news_items),
+        llm_report,
+        price_history,
+        reddit_weighted_score
+    )
+
+def analyze_ticker_json(ticker, use_llm=False):
+    """Analyzes a single ticker and returns JSON."""
+    try:
+        return json.dumps(analyze_ticker(ticker, use_llm).to_dict(), indent=2)
     except Exception as e:
          return json.dumps({"error": str(e), "ticker": ticker})
 
@@ -76,13 +117,34 @@ if __name__ == "__main__":
     parser.add_argument("--mode", choices=["trending", "analyze"], required=True, help="Action to perform")
     parser.add_argument("--ticker", help="Ticker symbol (required for analyze mode)")
     parser.add_argument("--llm", action="store_true", help="Enable LLM analysis (consumes API quota)")
+    parser.add_argument("--profile", action="store_true", help="Print per-stage timings and upstream call stats to stderr")
+    parser.add_argument("--metrics-file", help="Write metrics in Prometheus text format to this file")
+    parser.add_argument("--live", action="store_true", help="Ignore the scan snapshot and query live services")
     
     args = parser.parse_args()
+
+    # A fresh snapshot from snapshot.py answers without any network calls
+    snapshot = None
+    if not args.live:
+        from snapshot import load_snapshot
+        snapshot = load_snapshot()
     
     if args.mode == "trending":
-        print(get_trending_json())
+        if snapshot:
+            print(json.dumps(snapshot['trending'], indent=2))
+        else:
+            print(get_trending_json())
     elif args.mode == "analyze":
         if not args.ticker:
             print(json.dumps({"error": "--ticker is required for analyze mode"}))
             sys.exit(1)
-        print(analyze_ticker_json(args.ticker.upper(), args.llm))
+        ticker = args.ticker.upper()
+        if snapshot and ticker in snapshot['analyses'] and not args.llm:
+            print(json.dumps(snapshot['analyses'][ticker], indent=2))
+        else:
+            print(analyze_ticker_json(ticker, args.llm))
+
+    if args.profile:
+        print(format_summary(), file=sys.stderr)
+    if args.metrics_file:
+        write_prometheus(args.metrics_file)
@@ -1,6 +1,18 @@
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import math
+import threading
+import time
 
-analyzer = SentimentIntensityAnalyzer()
+# VADER reads its lexicon from disk when constructed, so the analyzer is
+# built on first use rather than at import time
+_analyzer = None
+
+def get_analyzer():
+    """Returns the shared VADER analyzer, creating it on first use."""
+    global _analyzer
+    if _analyzer is None:
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
 
 def analyze_text(text):
     """
@@ -15,10 +27,183 @@ def analyze_text(text):
     if not text:
         return {'compound': 0.0, 'pos': 0.0, 'neu': 1.0, 'neg': 0.0}
     
-    scores = analyzer.polarity_scores(text)
+    scores = get_analyzer().polarity_scores(text)
     return scores
 
-def generate_signal(sentiment_score, mention_volume, price_trend_pct=0):
+# A post's weight halves every SENTIMENT_HALF_LIFE_HOURS of age
+SENTIMENT_HALF_LIFE_HOURS = 24
+
+def engagement_weight(score):
+    """
+    Weight of a post by its Reddit score.
+
+    Logarithmic, so a 5k-upvote post outweighs a 2-upvote one (about 9.5
+    vs 2.1) without drowning out every other post. Downvoted posts get the
+    floor weight of 1.
+    """
+    return math.log1p(max(score or 0, 0)) + 1
+
+# Posts whose decayed weight falls below this are dropped from the aggregate;
+# a floor-weight post gets there after about a week at the default half-life
+MIN_POST_WEIGHT = 0.01
+# Adds between eviction sweeps
+EVICT_EVERY = 256
+
+class SentimentAggregator:
+    """
+    Engagement-weighted, time-decayed sentiment per ticker.
+
+    Each ticker keeps running sums of weight * compound and weight, both
+    decayed to the newest post seen, so adding a post and reading the score
+    are O(1) whatever the number of posts ingested. Each post's term is also
+    kept by permalink: re-ingesting a cached listing doesn't count a post
+    twice, and a post seen again with a new score has its old term swapped
+    for one at the new weight. Terms that have decayed below `min_weight`
+    are evicted every EVICT_EVERY adds, so memory stays bounded by the
+    posts that still matter. Thread-safe, so one instance can be shared by
+    the API server's workers.
+    """
+
+    def __init__(self, half_life_hours=SENTIMENT_HALF_LIFE_HOURS, min_weight=MIN_POST_WEIGHT):
+        self.decay_rate = math.log(2) / (half_life_hours * 3600)
+        self.min_weight = min_weight
+        # ticker -> [reference time, sum(w * compound), sum(w)]
+        self._sums = {}
+        # ticker -> {permalink: (created, engagement weight, compound)}
+        self._posts = {}
+        self._adds = 0
+        self._lock = threading.Lock()
+
+    def compound(self, ticker, post):
+        """The compound score stored for this post, or None if it hasn't been added."""
+        with self._lock:
+            entry = self._posts.get(ticker, {}).get(post.permalink)
+            return entry[2] if entry else None
+
+    def _decayed(self, sums, created, weight):
+        return weight * math.exp(-self.decay_rate * (sums[0] - created))
+
+    def add(self, ticker, post, compound):
+        """
+        Adds one scored post to a ticker's aggregate.
+
+        Args:
+            ticker (str): Ticker symbol.
+            post (Post): The post; its score and created time set the weight.
+            compound (float): The post's VADER compound score.
+
+        Returns:
+            bool: False if the post was already counted with this score.
+        """
+        weight = engagement_weight(post.score)
+        with self._lock:
+            posts = self._posts.setdefault(ticker, {})
+            previous = posts.get(post.permalink)
+            if previous is not None:
+                if previous[1:] == (weight, compound):
+                    return False
+                created = previous[0]
+            else:
+                created = post.created or time.time()
+
+            sums = self._sums.get(ticker)
+            if sums is None:
+                sums = self._sums[ticker] = [created, 0.0, 0.0]
+            elif created > sums[0]:
+                # Move the reference forward; exponents stay <= 0 so nothing overflows
+                factor = math.exp(-self.decay_rate * (created - sums[0]))
+                sums[0], sums[1], sums[2] = created, sums[1] * factor, sums[2] * factor
+
+            if previous is not None:
+                old = self._decayed(sums, previous[0], previous[1])
+                sums[1] -= old * previous[2]
+                sums[2] -= old
+            term = self._decayed(sums, created, weight)
+            sums[1] += term * compound
+            sums[2] += term
+            posts[post.permalink] = (created, weight, compound)
+
+            self._adds += 1
+            if self._adds % EVICT_EVERY == 0:
+                self._evict(time.time())
+            return True
+
+    def _evict(self, now):
+        # Called with the lock held
+        for ticker in list(self._posts):
+            posts, sums = self._posts[ticker], self._sums[ticker]
+            for permalink, (created, weight, compound) in list(posts.items()):
+                if weight * math.exp(-self.decay_rate * max(now - created, 0)) >= self.min_weight:
+                    continue
+                term = self._decayed(sums, created, weight)
+                sums[1] -= term * compound
+                sums[2] -= term
+                del posts[permalink]
+            if not posts:
+                del self._posts[ticker], self._sums[ticker]
+
+    def score(self, ticker):
+        """
+        Returns the weighted mean compound score, or 0 for an unseen ticker.
+
+        Decaying both sums to the query time scales them equally, so the
+        mean doesn't depend on when it is read.
+        """
+        with self._lock:
+            sums = self._sums.get(ticker)
+            if not sums or sums[2] <= 0:
+                return 0.0
+            return sums[1] / sums[2]
+
+    def weight(self, ticker, now=None):
+        """Total decayed weight behind a ticker's score at time `now`."""
+        with self._lock:
+            sums = self._sums.get(ticker)
+            if not sums:
+                return 0.0
+            age = max((now or time.time()) - sums[0], 0)
+            return max(sums[2], 0.0) * math.exp(-self.decay_rate * age)
+
+    def count(self, ticker):
+        """Number of posts currently held for a ticker."""
+        with self._lock:
+            return len(self._posts.get(ticker, ()))
+
+_aggregator = None
+
+def get_aggregator():
+    """Returns the process-wide SentimentAggregator."""
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = SentimentAggregator()
+    return _aggregator
+
+def score_posts(ticker, posts):
+    """
+    Scores posts with VADER and folds them into the shared aggregator.
+
+    Posts the aggregator already holds are not re-analyzed; their stored
+    compound is re-added so a changed Reddit score updates their weight.
+
+    Returns:
+        float: The ticker's engagement-weighted, time-decayed sentiment.
+    """
+    aggregator = get_aggregator()
+    for post in posts:
+        compound = aggregator.compound(ticker, post)
+        if compound is None:
+            compound = analyze_text(post.text)['compound']
+        aggregator.add(ticker, post, compound)
+    return aggregator.score(ticker)
+
+# Default thresholds for generate_signal; backtest.py sweeps over these
+SENTIMENT_THRESHOLD = 0.2
+MENTION_THRESHOLD = 10
+AVOID_THRESHOLD = -0.05
+
+def generate_signal(sentiment_score, mention_volume, price_trend_pct=0,
+                    sentiment_threshold=SENTIMENT_THRESHOLD, mention_threshold=MENTION_THRESHOLD,
+                    avoid_threshold=AVOID_THRESHOLD):
     """
     Generates a trading signal based on sentiment, volume, and price trend.
     
@@ -26,18 +211,21 @@ def generate_signal(sentiment_score, mention_volume, price_trend_pct=0):
         sentiment_score (float): The compound sentiment score (-1 to 1).
         mention_volume (int): The number of mentions or relative volume.
         price_trend_pct (float): Recent price change percentage.
+        sentiment_threshold (float): |sentiment| needed for BUY/SELL.
+        mention_threshold (int): Mentions needed for BUY/SELL.
+        avoid_threshold (float): Sentiment below which to AVOID.
         
     Returns:
         str: 'STRONG BUY', 'BUY', 'WATCH', 'AVOID', 'SELL'
     """
     # Simple logic for demonstration
-    if sentiment_score > 0.2 and mention_volume > 10:
+    if sentiment_score > sentiment_threshold and mention_volume > mention_threshold:
         if price_trend_pct > 0:
             return "STRONG BUY"
         return "BUY"
-    elif sentiment_score < -0.2 and mention_volume > 10:
+    elif sentiment_score < -sentiment_threshold and mention_volume > mention_threshold:
         return "SELL"
-    elif sentiment_score < -0.05:
+    elif sentiment_score < avoid_threshold:
         return "AVOID"
     else:
         return "WATCH"
@@ -0,0 +1,139 @@
+import argparse
+import gzip
+import json
+import mmap
+import os
+import sys
+import time
+from clients.instrumentation import span, format_summary
+
+# Bumped whenever the layout changes; consumers ignore other versions
+SNAPSHOT_VERSION = 1
+SNAPSHOT_PATH = os.getenv("SCANNER_SNAPSHOT_FILE", os.path.join("data", "snapshot.json.gz"))
+# Older snapshots are ignored and consumers fall back to live calls
+SNAPSHOT_MAX_AGE = int(os.getenv("SCANNER_SNAPSHOT_MAX_AGE", "900"))
+
+# How many tickers of each trending list the dashboard tables show
+DASHBOARD_SIZE = 10
+
+_loaded = {}
+
+
+def build_snapshot():
+    """
+    Runs a full scan: trending lists, then a price history update and one
+    analysis (quote with fundamentals, Reddit and news sentiment) per ticker
+    any consumer shows, plus market news.
+
+    Returns:
+        dict: The snapshot, ready for write_snapshot().
+    """
+    # Imported here so consumers that only read snapshots stay light
+    from history_store import update_history
+    from notify_telegram import analyze_tickers, fetch_market_news
+    from scanner_cli import get_trending
+    from subscribers import load_subscribers, collect_tickers
+
+    with span('snapshot.trending'):
+        trending = get_trending()
+    reddit_tickers = trending['reddit_trending']
+    yahoo_tickers = trending['yahoo_trending']
+
+    tickers = dict.fromkeys(reddit_tickers[:DASHBOARD_SIZE] + yahoo_tickers[:DASHBOARD_SIZE])
+    tickers.update(dict.fromkeys(collect_tickers(load_subscribers(), reddit_tickers, yahoo_tickers)))
+    # Appends only the bars since the last run; analyses read the multi-day returns from it
+    with span('snapshot.history'):
+        update_history(list(tickers))
+    with span('snapshot.analyze'):
+        analyses = analyze_tickers(list(tickers))
+    with span('snapshot.news'):
+        market_news = fetch_market_news()
+
+    return {
+        'version': SNAPSHOT_VERSION,
+        'created': time.time(),
+        'trending': trending,
+        'analyses': {ticker: analysis.to_dict() for ticker, analysis in analyses.items()},
+        'market_news': market_news,
+    }
+
+
+def write_snapshot(snapshot, path=SNAPSHOT_PATH):
+    """
+    Writes a snapshot as gzipped JSON.
+
+    The file is written beside the target and renamed over it, so readers
+    see either the old snapshot or the new one, never a partial file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(gzip.compress(json.dumps(snapshot).encode('utf-8'), compresslevel=6))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def load_snapshot(path=SNAPSHOT_PATH, max_age=SNAPSHOT_MAX_AGE):
+    """
+    Returns the latest snapshot if it is fresh enough.
+
+    The file is memory-mapped and decompressed straight from the map, and
+    the parsed result is reused until the file is replaced, so repeated
+    calls (e.g. every dashboard rerun) cost one stat.
+
+    Args:
+        path (str): Snapshot file.
+        max_age (float): Maximum age in seconds.
+
+    Returns:
+        dict: The snapshot, or None if it is missing, stale or unreadable.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    if time.time() - stat.st_mtime > max_age:
+        return None
+
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            snapshot = json.loads(gzip.decompress(data))
+    except (OSError, ValueError, EOFError) as e:
+        print(f"Error reading snapshot {path}: {e}")
+        return None
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        return None
+
+    _loaded[path] = (key, snapshot)
+    return snapshot
+
+
+def snapshot_analyses(snapshot):
+    """Returns the snapshot's analyses as ticker -> TickerAnalysis."""
+    from clients.records import TickerAnalysis
+    return {ticker: TickerAnalysis.from_dict(data) for ticker, data in snapshot['analyses'].items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a full scan and write the shared snapshot file")
+    parser.add_argument("--output", default=SNAPSHOT_PATH, help="Snapshot file to write")
+    parser.add_argument("--profile", action="store_true", help="Print per-stage timings and upstream call stats")
+    args = parser.parse_args()
+
+    snapshot = build_snapshot()
+    write_snapshot(snapshot, args.output)
+    print(f"Wrote {len(snapshot['analyses'])} analyses to {args.output} "
+          f"({os.path.getsize(args.output) / 1024:.1f} KB)")
+
+    if args.profile:
+        print(format_summary(), file=sys.stderr)
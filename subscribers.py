@@ -0,0 +1,111 @@
+import json
+import os
+from clients.telegram_client import get_subscribed_chat_ids
+
+# Digest sections, in the order they are rendered
+SECTIONS = ["reddit", "deep_dive", "yahoo", "watchlist", "news"]
+DEFAULT_SECTIONS = ["reddit", "deep_dive", "yahoo", "news"]
+
+# How many tickers each section draws from the shared trending lists
+REDDIT_TABLE_SIZE = 8
+DEEP_DIVE_SIZE = 3
+YAHOO_TABLE_SIZE = 6
+
+
+def _string_list(value, field, chat_id):
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"Subscriber {chat_id}: '{field}' must be a list of strings, got {value!r}")
+    return value
+
+
+def _normalize(entry):
+    if not isinstance(entry, dict):
+        raise ValueError(f"Subscriber entries must be objects, got {entry!r}")
+    chat_id = str(entry.get('chat_id', '')).strip()
+    if not chat_id:
+        return None
+
+    watchlist = [t.replace('$', '').strip().upper()
+                 for t in _string_list(entry.get('watchlist', []), 'watchlist', chat_id) if t.strip()]
+    sections = list(_string_list(entry.get('sections') or [], 'sections', chat_id)) or list(DEFAULT_SECTIONS)
+    if watchlist and 'watchlist' not in sections and 'sections' not in entry:
+        sections.append('watchlist')
+
+    unknown = [s for s in sections if s not in SECTIONS]
+    if unknown:
+        print(f"⚠️ Ignoring unknown digest sections for chat {chat_id}: {', '.join(unknown)}")
+
+    return {
+        'chat_id': chat_id,
+        'watchlist': watchlist,
+        'sections': [s for s in SECTIONS if s in sections]
+    }
+
+
+def load_subscribers(path=None):
+    """
+    Loads digest subscribers from a JSON config file.
+
+    The file (SUBSCRIBERS_FILE, default `subscribers.json`) holds a list of
+    objects with `chat_id`, an optional `watchlist` of tickers and optional
+    `sections` (any of SECTIONS). Without a file, every chat in
+    TELEGRAM_CHAT_IDS / TELEGRAM_CHAT_ID gets the default digest.
+
+    Args:
+        path (str): Optional path overriding SUBSCRIBERS_FILE.
+
+    Returns:
+        list: Normalized subscriber dicts.
+
+    Raises:
+        ValueError: If the file isn't a list of subscriber objects, or an
+            entry's watchlist or sections aren't lists of strings.
+    """
+    path = path or os.getenv("SUBSCRIBERS_FILE", "subscribers.json")
+    if not os.path.exists(path):
+        return [_normalize({'chat_id': chat_id}) for chat_id in get_subscribed_chat_ids()]
+
+    try:
+        with open(path) as f:
+            entries = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error reading subscribers from {path}: {e}")
+        return []
+    if not isinstance(entries, list):
+        raise ValueError(f"{path} must hold a list of subscribers, got {type(entries).__name__}")
+
+    subscribers = []
+    for entry in entries:
+        subscriber = _normalize(entry)
+        if subscriber:
+            subscribers.append(subscriber)
+    return subscribers
+
+
+def tickers_for_subscriber(subscriber, reddit_tickers, yahoo_tickers):
+    """Returns the tickers one subscriber's digest needs analyzed, in order."""
+    sections = subscriber['sections']
+    tickers = []
+    if 'reddit' in sections:
+        tickers += reddit_tickers[:REDDIT_TABLE_SIZE]
+    if 'deep_dive' in sections:
+        tickers += reddit_tickers[:DEEP_DIVE_SIZE]
+    if 'yahoo' in sections:
+        tickers += yahoo_tickers[:YAHOO_TABLE_SIZE]
+    if 'watchlist' in sections:
+        tickers += subscriber['watchlist']
+    return tickers
+
+
+def collect_tickers(subscribers, reddit_tickers, yahoo_tickers):
+    """
+    Returns the union of tickers needed by all subscribers.
+
+    Each symbol appears once however many digests include it, so the
+    analysis cost of a run scales with distinct tickers, not subscribers.
+    """
+    seen = {}
+    for subscriber in subscribers:
+        for ticker in tickers_for_subscriber(subscriber, reddit_tickers, yahoo_tickers):
+            seen.setdefault(ticker, None)
+    return list(seen)
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+import scanner_cli
+from api_server import ScannerService
+
+
+class Analysis:
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def to_dict(self):
+        return {'ticker': self.ticker}
+
+
+def test_concurrent_analyze_requests_run_once(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def analyze_ticker(ticker, use_llm=False):
+        with lock:
+            calls.append(ticker)
+        time.sleep(0.2)
+        return Analysis(ticker)
+
+    monkeypatch.setattr(scanner_cli, 'analyze_ticker', analyze_ticker)
+    service = ScannerService()
+
+    async def burst():
+        return await asyncio.gather(*(service.handle("/analyze/aapl", {}) for _ in range(10)))
+
+    results = asyncio.run(burst())
+    assert calls == ['AAPL']
+    assert all(result == (200, {'ticker': 'AAPL'}) for result in results)
+
+
+def test_analyze_rejects_malformed_tickers():
+    service = ScannerService()
+    for path in ("/analyze/AAPL/foo", "/analyze/A;B", "/analyze/1ABC"):
+        status, body = asyncio.run(service.handle(path, {}))
+        assert status == 400, path
+        assert 'invalid ticker' in body['error']
+
+
+def test_idle_connections_time_out():
+    async def scenario():
+        service = ScannerService(read_timeout=0.2)
+        server = await asyncio.start_server(service.serve_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            # Send nothing; the server should answer 408 and close
+            response = await asyncio.wait_for(reader.read(), 2)
+            writer.close()
+            return response
+
+    assert asyncio.run(scenario()).startswith(b"HTTP/1.1 408")
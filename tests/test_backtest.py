@@ -0,0 +1,74 @@
+import csv
+import numpy as np
+from backtest import SIGNAL_NAMES, generate_signals, load_observations, append_observations
+from clients.records import TickerAnalysis
+from sentiment import generate_signal
+
+
+def test_vectorized_signals_match_generate_signal():
+    rng = np.random.default_rng(0)
+    sentiment = rng.uniform(-1, 1, 5000)
+    mentions = rng.integers(0, 40, 5000).astype(np.float64)
+    trend = rng.uniform(-5, 5, 5000)
+    # Values exactly on each threshold exercise the strict comparisons
+    sentiment[:6] = [0.2, -0.2, -0.05, 0.2, 0.21, -0.21]
+    mentions[:6] = [10, 10, 0, 11, 10, 11]
+    trend[:6] = [1, 1, 0, 0, 1, 0]
+
+    for thresholds in ({}, {'sentiment_threshold': 0.1, 'mention_threshold': 2, 'avoid_threshold': -0.1}):
+        codes = generate_signals(sentiment, mentions, trend, **thresholds)
+        expected = [generate_signal(s, m, t, **thresholds) for s, m, t in zip(sentiment, mentions, trend)]
+        assert [SIGNAL_NAMES[c] for c in codes] == expected
+
+
+def test_load_observations_uses_mentions_and_weighted_score(tmp_path):
+    path = str(tmp_path / "obs.csv")
+    analysis = TickerAnalysis('GME', None, 0.1, 0.5, 10, 3, reddit_weighted_score=0.7)
+    append_observations({'GME': analysis}, {'GME': 42}, path)
+
+    days, sentiment, mentions = load_observations(path)['GME']
+    assert mentions[0] == 42
+    assert abs(sentiment[0] - 0.6) < 1e-9
+    # Bullish rows with uncapped mentions can actually reach BUY
+    assert SIGNAL_NAMES[generate_signals(sentiment, mentions, np.zeros(1))[0]] == 'BUY'
+
+
+def test_old_observation_files_are_upgraded(tmp_path):
+    path = str(tmp_path / "obs.csv")
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['date', 'ticker', 'reddit_score', 'news_score', 'mentions', 'posts'])
+        writer.writerow(['2026-01-02', 'AMC', '0.3000', '0.1000', '15', '10'])
+
+    append_observations({'AMC': TickerAnalysis('AMC', None, 0.2, 0.2, 5, 1)}, {'AMC': 20}, path)
+
+    series = load_observations(path)['AMC']
+    assert len(series[0]) == 2
+    assert abs(series[1][0] - 0.2) < 1e-9
+
+
+def test_build_panel_aligns_observations_with_stored_bars(tmp_path, monkeypatch):
+    import history_store
+    from backtest import build_panel
+    from clients import throttle
+    from tests.test_history_store import daily_frame, install_fake_yfinance
+
+    monkeypatch.setattr(history_store, 'HISTORY_DIR', str(tmp_path / "history"))
+    monkeypatch.setattr(throttle, 'acquire', lambda *a, **k: None)
+    monkeypatch.setattr(throttle, 'report', lambda *a, **k: None)
+    frame = daily_frame(30)
+    install_fake_yfinance(monkeypatch, frame)
+    history_store.update_symbol('GME')
+
+    bar_days = [ts.date() for ts in frame.index]
+    path = str(tmp_path / "obs.csv")
+    for i in (3, 10, 20):
+        analysis = TickerAnalysis('GME', None, 0.5, 0.5, 10, 3)
+        append_observations({'GME': analysis}, {'GME': 20}, path, day=bar_days[i])
+
+    panel = build_panel(load_observations(path), horizon=2, trend_days=2)
+    # The entry is the bar after each observation day
+    assert [str(day) for day in panel['entry_day']] == [str(bar_days[i + 1]) for i in (3, 10, 20)]
+    close = frame['Close'].to_numpy()
+    assert np.allclose(panel['forward_return'], [close[i + 3] / close[i + 1] - 1 for i in (3, 10, 20)])
+    assert np.allclose(panel['trend'], [(close[i] / close[i - 2] - 1) * 100 for i in (3, 10, 20)])
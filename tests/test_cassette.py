@@ -0,0 +1,24 @@
+from clients import cassette
+
+
+def test_recorded_calls_replay_however_arguments_are_passed(tmp_path):
+    calls = []
+    saved = dict(cassette._config)
+
+    @cassette.recorded('test.lookup', host='example.com')
+    def lookup(ticker, extended_info=False):
+        calls.append((ticker, extended_info))
+        return {'ticker': ticker, 'extended': extended_info}
+
+    try:
+        cassette.configure(mode='record', directory=str(tmp_path))
+        assert lookup('GME', True) == {'ticker': 'GME', 'extended': True}
+        lookup('AMC')
+
+        cassette.configure(mode='replay')
+        assert lookup('GME', extended_info=True) == {'ticker': 'GME', 'extended': True}
+        assert lookup(ticker='GME', extended_info=True)['extended'] is True
+        assert lookup('AMC', False) == {'ticker': 'AMC', 'extended': False}
+        assert len(calls) == 2
+    finally:
+        cassette._config.update(saved)
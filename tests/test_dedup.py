@@ -0,0 +1,32 @@
+from clients import dedup
+from clients.dedup import NearDuplicateIndex, DUPLICATE_THRESHOLD, signature, unique
+
+BASE = "GME short squeeze is finally happening says retail traders on the forum today"
+# Shares 10 of its 12 shingles with BASE (Jaccard about 0.77)
+EDITED = "GME short squeeze is finally happening says retail traders on the forum right now"
+# Shares the opening words only (Jaccard about 0.2)
+DIFFERENT = "GME short squeeze is finally happening but hedge funds deny everything in their filings"
+
+
+def similarity(a, b):
+    return (signature(a) == signature(b)).mean()
+
+
+def test_pairs_either_side_of_the_threshold():
+    assert similarity(BASE, EDITED) >= DUPLICATE_THRESHOLD
+    assert similarity(BASE, DIFFERENT) < DUPLICATE_THRESHOLD
+
+    index = NearDuplicateIndex()
+    assert index.add('base', BASE) is None
+    assert index.add('edited', EDITED) == 'base'
+    assert index.add('different', DIFFERENT) is None
+
+
+def test_word_less_texts_only_match_themselves():
+    assert dedup.shingles("🚀🚀🚀") != dedup.shingles("💎🙌")
+    assert unique(["🚀🚀🚀", "💎🙌", " 🚀🚀🚀 "]) == ["🚀🚀🚀", "💎🙌"]
+
+
+def test_unique_keeps_the_first_of_each_cluster():
+    posts = [('low', EDITED), ('high', BASE), ('other', DIFFERENT)]
+    assert unique(posts, text=lambda post: post[1]) == [('low', EDITED), ('other', DIFFERENT)]
@@ -0,0 +1,69 @@
+import sys
+import types
+import numpy as np
+import pandas as pd
+import history_store
+from clients import throttle
+
+
+def install_fake_yfinance(monkeypatch, frame):
+    requests = []
+
+    class Ticker:
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        def history(self, period=None, start=None, interval='1d', auto_adjust=False):
+            requests.append(start)
+            if start is None:
+                return frame
+            return frame[frame.index >= pd.Timestamp(start, unit='s', tz='UTC')]
+
+    monkeypatch.setitem(sys.modules, 'yfinance', types.SimpleNamespace(Ticker=Ticker))
+    return requests
+
+
+def daily_frame(days=30):
+    # yfinance's daily index under pandas 3: second resolution, exchange time zone
+    dates = pd.date_range(end=pd.Timestamp.now(tz='America/New_York').normalize(), periods=days, freq='D')
+    index = pd.DatetimeIndex(dates).as_unit('s')
+    close = np.linspace(100, 129, days)
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': np.full(days, 1e6)}, index=index)
+
+
+def test_update_then_read_returns(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_store, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(throttle, 'acquire', lambda *a, **k: None)
+    monkeypatch.setattr(throttle, 'report', lambda *a, **k: None)
+    frame = daily_frame()
+    requests = install_fake_yfinance(monkeypatch, frame)
+
+    assert history_store.update_symbol('TEST') == 30
+    bars = history_store.load_history('TEST')
+    assert list(bars['ts']) == [int(ts.timestamp()) for ts in frame.index]
+
+    assert history_store.get_return_pct('TEST', 5) == (129 / 124 - 1) * 100
+    assert history_store.get_avg_volume('TEST') == 1e6
+
+    # The second run asks only from the last bar and rewrites it in place
+    history_store.update_symbol('TEST')
+    assert requests[-1] == int(frame.index[-1].timestamp())
+    assert len(history_store.load_history('TEST')) == 30
+
+
+def test_store_with_broken_timestamps_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_store, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(throttle, 'acquire', lambda *a, **k: None)
+    monkeypatch.setattr(throttle, 'report', lambda *a, **k: None)
+    install_fake_yfinance(monkeypatch, daily_frame())
+
+    path = tmp_path / '1d' / 'TEST.bin'
+    path.parent.mkdir()
+    broken = np.zeros(50, dtype=history_store.BAR_DTYPE)
+    broken['ts'] = 1
+    path.write_bytes(broken.tobytes())
+
+    history_store.update_symbol('TEST')
+    assert len(history_store.load_history('TEST')) == 30
+    assert history_store.get_return_pct('TEST', 1) is not None
@@ -0,0 +1,56 @@
+import history_store
+import monitor
+from clients.records import Quote
+from monitor import evaluate_rules
+
+
+def quote(change_pct, volume=100, day='2026-10-15'):
+    return Quote('GME', 10.0, change_pct, volume, trading_day=day)
+
+
+def run(changes, **kwargs):
+    """Feeds successive quotes through the rules, returning the alerts per step."""
+    state, alerts = None, []
+    for q in changes:
+        state, step = evaluate_rules('GME', q, previous=state, **kwargs)
+        alerts.append(step)
+    return alerts
+
+
+def test_move_alerts_on_each_further_threshold():
+    alerts = run([quote(2.9), quote(3.1), quote(4.0), quote(6.2), quote(3.5), quote(-3.2)])
+    assert [len(step) for step in alerts] == [0, 1, 0, 1, 0, 1]
+    assert alerts[1][0].startswith("🚀 *GME* +3.1%")
+    assert alerts[5][0].startswith("🔻 *GME* -3.2%")
+
+
+def test_volume_spike_alerts_once_per_spike():
+    alerts = run([quote(0, 150), quote(0, 250), quote(0, 300), quote(0, 150), quote(0, 220)], avg_volume=100)
+    assert [len(step) for step in alerts] == [0, 1, 0, 0, 1]
+    assert "2.5x" in alerts[1][0]
+
+
+def test_move_and_volume_reset_on_a_new_trading_day():
+    alerts = run([quote(3.5, 250, '2026-10-15'), quote(4.0, 260, '2026-10-16')], avg_volume=100)
+    assert [len(step) for step in alerts] == [2, 2]
+
+
+def test_sentiment_state_carries_across_days():
+    state, _ = evaluate_rules('GME', quote(0, day='2026-10-15'), sentiment_score=0.5)
+    state, alerts = evaluate_rules('GME', quote(0, day='2026-10-16'), sentiment_score=-0.5, previous=state)
+    assert alerts == ["🔄 *GME* Reddit sentiment turned bearish 🔴 (-0.50)"]
+
+
+def test_history_is_updated_once_per_trading_day(monkeypatch):
+    quotes = {'GME': quote(0, day='2026-10-15')}
+    updates = []
+    monkeypatch.setattr(monitor, 'get_batch_quotes', lambda symbols: quotes)
+    monkeypatch.setattr(history_store, 'update_history', lambda symbols: updates.append(list(symbols)))
+    monkeypatch.setattr(history_store, 'get_avg_volume', lambda symbol: None)
+
+    history_days = {}
+    for _ in range(3):
+        monitor.run_cycle({'GME': ['1']}, {}, history_days=history_days)
+    quotes['GME'] = quote(0, day='2026-10-16')
+    monitor.run_cycle({'GME': ['1']}, {}, history_days=history_days)
+    assert updates == [['GME'], ['GME']]
@@ -0,0 +1,49 @@
+from clients import reddit_client, reddit_scheduler
+from clients.records import Post
+
+
+def stub_scan(monkeypatch, fresh=True):
+    """Replaces network and disk with stubs; returns the list of fetched (sub, sort)."""
+    fetched = []
+    saved = {}
+
+    def fetch(sub, sort, limit=100, delay=1.0):
+        fetched.append((sub, sort))
+        return [Post(f'{sub} GME', '', f'/{sub}/{sort}/{i}', 1, 1000.0 - i * 60, sub) for i in range(3)], fresh
+
+    monkeypatch.setattr(reddit_client, '_fetch_listing', fetch)
+    monkeypatch.setattr(reddit_client, '_recall_listing', lambda sub, sort: [])
+    monkeypatch.setattr(reddit_scheduler, 'load_schedule', lambda: {})
+    monkeypatch.setattr(reddit_scheduler, 'save_schedule', saved.update)
+    reddit_client._listing_cache.clear()
+    return fetched, saved
+
+
+def test_searches_reuse_the_scan_and_respect_its_budget(monkeypatch):
+    fetched, _ = stub_scan(monkeypatch)
+    monkeypatch.setenv("REDDIT_REQUEST_BUDGET", "4")
+    subreddits = [f's{i}' for i in range(12)]
+
+    reddit_client.get_trending_tickers(subreddits)
+    assert len(fetched) == 4
+    assert reddit_client.get_ticker_discussions('GME', subreddits)
+    assert len(fetched) == 4
+
+
+def test_scan_cache_is_keyed_by_budget(monkeypatch):
+    fetched, _ = stub_scan(monkeypatch)
+    reddit_client.scan_listings(['a', 'b', 'c'], budget=2)
+    reddit_client.scan_listings(['a', 'b', 'c'], budget=2)
+    assert len(fetched) == 2
+    reddit_client.scan_listings(['a', 'b', 'c'], budget=6)
+    assert len(fetched) == 8
+
+
+def test_fallback_listings_do_not_advance_last_polled(monkeypatch):
+    _, saved = stub_scan(monkeypatch, fresh=False)
+    reddit_client.scan_listings(['a'], budget=2)
+    assert 'a' not in saved
+
+    _, saved = stub_scan(monkeypatch, fresh=True)
+    reddit_client.scan_listings(['a'], budget=2)
+    assert 'last_polled' in saved['a']
@@ -0,0 +1,59 @@
+import pytest
+from clients import reddit_scheduler
+from clients.reddit_scheduler import MAX_STALENESS, MIN_RATE, RATE_SMOOTHING, observe, plan_polls
+from clients.records import Post
+
+NOW = 1_000_000.0
+
+
+def posts_every(seconds, count):
+    return [Post('t', '', f'/p{i}', 1, NOW - i * seconds, 'stocks') for i in range(count)]
+
+
+def test_unknown_then_stale_then_by_expected_posts():
+    schedule = {
+        'busy': {'rate': 1 / 60, 'last_polled': NOW - 600},       # ~10 new posts
+        'quiet': {'rate': 1 / 3600, 'last_polled': NOW - 600},    # ~0.2 new posts
+        'stale': {'rate': MIN_RATE, 'last_polled': NOW - MAX_STALENESS - 1},
+    }
+    subreddits = ['quiet', 'busy', 'stale', 'fresh']
+    assert plan_polls(subreddits, schedule, budget=8, now=NOW) == ['fresh', 'stale', 'busy', 'quiet']
+    assert plan_polls(subreddits, schedule, budget=4, now=NOW) == ['fresh', 'stale']
+
+
+def test_expected_posts_are_capped_at_one_page():
+    schedule = {
+        # Both would have filled a page long ago; the cap makes them tie, so order is kept
+        'a': {'rate': 1.0, 'last_polled': NOW - 3600},
+        'b': {'rate': 10.0, 'last_polled': NOW - 3600},
+    }
+    assert reddit_scheduler.expected_new_posts(schedule['b'], 100, NOW) == 100
+    assert plan_polls(['a', 'b'], schedule, budget=2, now=NOW) == ['a']
+
+
+@pytest.mark.parametrize('budget', [0, 1])
+def test_budget_below_one_poll_still_polls_one(budget):
+    assert plan_polls(['a', 'b'], {}, budget=budget, now=NOW) == ['a']
+
+
+def test_observe_smooths_the_rate():
+    schedule = {}
+    observe(schedule, 'stocks', posts_every(60, 11), now=NOW)
+    assert schedule['stocks'] == {'last_polled': NOW, 'rate': pytest.approx(1 / 60)}
+
+    observe(schedule, 'stocks', posts_every(30, 11), now=NOW + 60)
+    expected = RATE_SMOOTHING * (1 / 30) + (1 - RATE_SMOOTHING) * (1 / 60)
+    assert schedule['stocks']['rate'] == pytest.approx(expected)
+    assert schedule['stocks']['last_polled'] == NOW + 60
+
+
+def test_observe_floors_the_rate():
+    schedule = {}
+    observe(schedule, 'dead', posts_every(30 * 86400, 3), now=NOW)
+    assert schedule['dead']['rate'] == MIN_RATE
+
+
+def test_observe_needs_two_timestamps_for_a_rate():
+    schedule = {}
+    observe(schedule, 'stocks', posts_every(60, 1), now=NOW)
+    assert schedule['stocks'] == {'last_polled': NOW}
@@ -0,0 +1,39 @@
+import math
+from clients.records import Post
+from sentiment import SentimentAggregator, engagement_weight
+
+
+def brute_force(posts, decay_rate):
+    weights = [engagement_weight(score) * math.exp(-decay_rate * (1e6 - created))
+               for score, created, _ in posts.values()]
+    return sum(w * c for w, (_, _, c) in zip(weights, posts.values())) / sum(weights)
+
+
+def test_rescored_post_replaces_its_term():
+    aggregator = SentimentAggregator()
+    latest = {}
+    for i, (score, compound) in enumerate([(2, 0.5), (5000, -0.8), (10, 0.1)]):
+        post = Post('t', '', f'/p{i}', score, 1e6 - i * 3600, 'stocks')
+        aggregator.add('GME', post, compound)
+        latest[post.permalink] = (score, post.created, compound)
+
+    # The downvoted-then-viral case: the same post comes back with far more upvotes
+    rescored = Post('t', '', '/p0', 9000, 1e6, 'stocks')
+    assert aggregator.add('GME', rescored, 0.5)
+    assert not aggregator.add('GME', rescored, 0.5)
+    latest['/p0'] = (9000, 1e6, 0.5)
+
+    assert aggregator.count('GME') == 3
+    assert abs(aggregator.score('GME') - brute_force(latest, aggregator.decay_rate)) < 1e-9
+
+
+def test_decayed_posts_are_evicted():
+    aggregator = SentimentAggregator(min_weight=0.5)
+    aggregator.add('AMC', Post('old', '', '/old', 0, 1.0, 'stocks'), -1.0)
+    aggregator.add('AMC', Post('new', '', '/new', 0, 1e6, 'stocks'), 0.4)
+    aggregator._evict(1e6)
+
+    assert aggregator.count('AMC') == 1
+    assert abs(aggregator.score('AMC') - 0.4) < 1e-9
+    aggregator._evict(1e7)
+    assert aggregator.count('AMC') == 0 and aggregator.score('AMC') == 0.0
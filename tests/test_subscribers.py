@@ -0,0 +1,28 @@
+import json
+import pytest
+from subscribers import load_subscribers, tickers_for_subscriber
+
+
+def write(tmp_path, data):
+    path = tmp_path / "subscribers.json"
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def test_watchlist_is_normalized_and_adds_its_section(tmp_path):
+    [subscriber] = load_subscribers(write(tmp_path, [{'chat_id': 42, 'watchlist': ['$gme', ' amc ', '']}]))
+    assert subscriber['chat_id'] == '42'
+    assert subscriber['watchlist'] == ['GME', 'AMC']
+    assert tickers_for_subscriber(subscriber, ['TSLA'], ['NVDA']) == ['TSLA', 'TSLA', 'NVDA', 'GME', 'AMC']
+
+
+@pytest.mark.parametrize('data, message', [
+    ({'chat_id': 1}, 'must hold a list'),
+    ([['1']], 'must be objects'),
+    ([{'chat_id': 7, 'watchlist': 'GME'}], "Subscriber 7: 'watchlist'"),
+    ([{'chat_id': 7, 'watchlist': [3]}], "Subscriber 7: 'watchlist'"),
+    ([{'chat_id': 8, 'sections': ['news', None]}], "Subscriber 8: 'sections'"),
+])
+def test_malformed_files_raise_value_error(tmp_path, data, message):
+    with pytest.raises(ValueError, match=message):
+        load_subscribers(write(tmp_path, data))
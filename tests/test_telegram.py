@@ -0,0 +1,63 @@
+import asyncio
+from clients import telegram_client
+from clients.telegram_client import CODE_FENCE, split_message
+
+
+def assert_renderable(chunks, limit):
+    for chunk in chunks:
+        assert len(chunk) <= limit
+        fences = [line for line in chunk.splitlines() if line.strip().startswith(CODE_FENCE)]
+        assert len(fences) % 2 == 0, chunk
+
+
+def test_short_message_is_not_split():
+    assert split_message("hello", 10) == ["hello"]
+
+
+def test_long_message_splits_on_lines():
+    message = "".join(f"line {i}\n" for i in range(40))
+    chunks = split_message(message, 50)
+    assert len(chunks) > 1
+    assert "".join(chunks) == message
+    assert_renderable(chunks, 50)
+
+
+def test_code_block_is_closed_and_reopened_across_chunks():
+    message = "intro\n```python\n" + "".join(f"row {i}\n" for i in range(30)) + "```\nafter\n"
+    chunks = split_message(message, 60)
+    assert_renderable(chunks, 60)
+    assert all(chunk.startswith("```python\n") for chunk in chunks[1:])
+    assert chunks[-1].endswith("```\nafter\n")
+
+
+def test_unclosed_code_block_is_closed_in_last_chunk():
+    chunks = split_message("a\n```\n" + "y" * 100, 50)
+    assert_renderable(chunks, 50)
+    # The opening fence moves to the chunk its content starts in
+    assert chunks[0] == "a\n"
+    assert "".join(c.replace("```\n", "") for c in chunks).replace("\n", "") == "a" + "y" * 100
+
+
+def test_line_longer_than_limit_is_hard_wrapped():
+    chunks = split_message("x" * 130, 50)
+    assert "".join(chunks) == "x" * 130
+    assert_renderable(chunks, 50)
+
+
+def test_async_delivery_runs_inside_an_event_loop(monkeypatch):
+    class Response:
+        status_code = 200
+
+    async def post(self, payload):
+        sent.append(payload['chat_id'])
+        return Response()
+
+    sent = []
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "token")
+    monkeypatch.setattr(telegram_client.TelegramDeliveryQueue, '_post', post)
+
+    async def caller():
+        return await telegram_client.deliver_messages_async({'1': "hi", '2': "there"})
+
+    assert asyncio.run(caller()) == {'1': True, '2': True}
+    assert sorted(sent) == ['1', '2']
@@ -0,0 +1,92 @@
+import subprocess
+import sys
+import types
+import pytest
+from clients import throttle
+
+REDDIT = 'www.reddit.com'
+
+
+@pytest.fixture
+def clock(tmp_path, monkeypatch):
+    """Points the store at a fresh file and replaces wall time with a manual clock."""
+    fake = types.SimpleNamespace(now=1_000_000.0, slept=[])
+    fake.time = lambda: fake.now
+    fake.sleep = fake.slept.append
+    monkeypatch.setattr(throttle, 'DB_PATH', str(tmp_path / "throttle.sqlite3"))
+    monkeypatch.setattr(throttle, 'time', fake)
+    return fake
+
+
+def test_rate_halves_on_429_and_recovers_additively(clock):
+    start, floor, ceiling = throttle.BUCKET_LIMITS['reddit']
+    throttle.report(REDDIT, 429)
+    assert throttle.host_state(REDDIT)['rate'] == start / 2
+    for _ in range(10):
+        throttle.report(REDDIT, 429)
+    assert throttle.host_state(REDDIT)['rate'] == floor
+
+    throttle.report(REDDIT, 200)
+    assert throttle.host_state(REDDIT)['rate'] == pytest.approx(floor + throttle.RATE_STEP)
+    for _ in range(100):
+        throttle.report(REDDIT, 304)
+    assert throttle.host_state(REDDIT)['rate'] == ceiling
+
+
+def test_other_errors_leave_the_rate_alone(clock):
+    throttle.report(REDDIT, 429)
+    before = throttle.host_state(REDDIT)
+    for status in (403, 404, 500):
+        throttle.report(REDDIT, status)
+    assert throttle.host_state(REDDIT) == before
+
+
+def test_yahoo_hosts_share_one_bucket(clock):
+    throttle.report('query1.finance.yahoo.com', 429)
+    assert throttle.host_state('query2.finance.yahoo.com')['rate'] == throttle.BUCKET_LIMITS['yahoo'][0] / 2
+
+
+def test_breaker_opens_half_opens_and_closes(clock):
+    for _ in range(throttle.BREAKER_THRESHOLD):
+        throttle.report(REDDIT, 429)
+    with pytest.raises(throttle.CircuitOpen):
+        throttle.acquire(REDDIT)
+
+    # After the cooldown one trial request goes out; another 429 re-opens at once
+    clock.now += throttle.BREAKER_COOLDOWN + 1
+    throttle.acquire(REDDIT)
+    throttle.report(REDDIT, 429)
+    with pytest.raises(throttle.CircuitOpen):
+        throttle.acquire(REDDIT)
+
+    # A success closes it
+    clock.now += throttle.BREAKER_COOLDOWN + 1
+    throttle.acquire(REDDIT)
+    throttle.report(REDDIT, 200)
+    assert throttle.host_state(REDDIT)['failures'] == 0
+    throttle.acquire(REDDIT)
+
+
+def test_acquire_waits_up_to_max_wait(clock):
+    for _ in range(throttle.BURST):
+        throttle.acquire(REDDIT)
+    assert clock.slept == []
+    throttle.acquire(REDDIT)
+    assert clock.slept == [pytest.approx(1.0)]
+    # The next slot is two seconds out, more than this caller will wait
+    with pytest.raises(throttle.CircuitOpen):
+        throttle.acquire(REDDIT, max_wait=1.5)
+
+
+def test_state_is_shared_across_processes(tmp_path, monkeypatch):
+    db = str(tmp_path / "throttle.sqlite3")
+    monkeypatch.setattr(throttle, 'DB_PATH', db)
+    script = ("from clients import throttle; throttle.DB_PATH = %r\n"
+              "for _ in range(throttle.BREAKER_THRESHOLD): throttle.report(%r, 429)" % (db, REDDIT))
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+    state = throttle.host_state(REDDIT)
+    assert state['failures'] == throttle.BREAKER_THRESHOLD
+    assert state['open_for'] > 0
+    with pytest.raises(throttle.CircuitOpen):
+        throttle.acquire(REDDIT)